@@ -13,6 +13,20 @@ from dotenv import load_dotenv
 from contextlib import contextmanager  # for any local context managers
 
 from database_pool import get_db_cursor, db_pool  # ↪ use the Postgres pool!
+from db_cursors import TimedCursor
+from pdf_validation import validate_pdf, MAX_PDF_BYTES
+from resume_extraction import schedule_extraction, content_hash
+from admin_search import search_admin, SEARCH_PAGE_SIZE
+from storage import get_storage, resume_key
+from admin_tables import load_page_snapshot, load_admin_overview, TABLE_SPECS, UNASSIGNED
+from exports import export_csv_gz, export_season_parquet_zip
+from allocation import (smart_cv_allocation, claim_next_cv, renew_assignment_leases, preview_allocation,
+                        apply_allocation_plan, ALLOCATION_MODES)
+from auto_allocation import start_auto_allocation
+from analytics import load_analytics, refresh_analytics, start_scheduled_refresh
+from bulk_import import IMPORT_TARGETS, read_import_file, validate_import, import_rows
+from table_sync import (compute_changes, bulk_apply_changes, format_save_report,
+                        USER_DATA_COLUMNS, REVIEWER_DATA_COLUMNS, REVIEWS_DATA_COLUMNS, REVIEWS_BLANK_AS_NULL)
 
 import smtplib
 from email.mime.multipart import MIMEMultipart
@@ -521,25 +535,17 @@ def timing_decorator(func):
     """Dummy decorator - performance monitoring disabled"""
     return func
 
-@timing_decorator
-def load_reviewer_names():
-    """Load reviewer names without caching to avoid connection issues"""
-    with get_db_cursor() as (_, cur):
-        cur.execute("SELECT DISTINCT name FROM reviewer_data ORDER BY name;")
-        return [r["name"] for r in cur.fetchall()]
-
 @st.cache_data(ttl=300)
 def load_profiles():
     return ['Data', 'Software', 'Consult', 'Finance/Quant', 'Product', 'FMCG', 'Core']
 
 @timing_decorator
 @st.cache_data(show_spinner=False)
-def pdf_to_base64(path: str):
-    try:
-        with open(path, "rb") as f:
-            return base64.b64encode(f.read()).decode('utf-8')
-    except FileNotFoundError:
+def pdf_to_base64(key: str):
+    data = get_storage().get(key)
+    if data is None:
         return None
+    return base64.b64encode(data).decode('utf-8')
 
 @timing_decorator
 def get_reviewer_info(name: str):
@@ -563,8 +569,31 @@ def get_table_download_link(df, filename, text):
     b64 = base64.b64encode(csv.encode()).decode()
     return f'<a href="data:file/csv;base64,{b64}" download="{filename}">{text}</a>'
 
-def show_pdf(path):
-    b64 = pdf_to_base64(path)
+def csv_export_button(cursor, table, filename, label):
+    """Build a gzipped CSV export via COPY only when the admin asks for it"""
+    export_key = f"export_{table}"
+    if st.button(label, key=f"{export_key}_prepare"):
+        # download_button only takes bytes/str/BytesIO, and holds the payload in memory anyway
+        with export_csv_gz(cursor, table) as export_file:
+            st.session_state[export_key] = export_file.read()
+    export_file = st.session_state.get(export_key)
+    if export_file is not None:
+        st.download_button(
+            f"⬇️ Save {filename}.gz",
+            data=export_file,
+            file_name=f"{filename}.gz",
+            mime="application/gzip",
+            key=f"{export_key}_download"
+        )
+
+def show_pdf(key):
+    # Object storage serves the PDF to the browser directly; only local disk falls back to base64
+    url = get_storage().presigned_url(key)
+    if url:
+        st.markdown(f'<iframe src="{url}" width="700" height="1000"></iframe>',
+                    unsafe_allow_html=True)
+        return
+    b64 = pdf_to_base64(key)
     if b64:
         st.markdown(f'<iframe src="data:application/pdf;base64,{b64}" width="700" height="1000"></iframe>',
                     unsafe_allow_html=True)
@@ -625,7 +654,148 @@ def display_error_details(error_msg, exception):
     print(traceback.format_exc())  # Logs to console
     print(f"{'='*50}\n")
 
+def date_range_filter(label, key):
+    """Date range picker that returns (date_from, date_to), either of which may be None"""
+    picked = st.date_input(label, value=[], key=key)
+    if isinstance(picked, (list, tuple)):
+        date_from = picked[0] if len(picked) > 0 else None
+        date_to = picked[1] if len(picked) > 1 else None
+        return date_from, date_to
+    return picked, picked
+
+def admin_table_page(cursor, table, filters, key_prefix, default_sort="id", now=None):
+    """Render sort controls and fetch the current keyset page of an admin table"""
+    sortable = TABLE_SPECS[table]["sortable"]
+    sort_col1, sort_col2 = st.columns([3, 1])
+    with sort_col1:
+        sort_by = st.selectbox("Sort by", sortable, index=sortable.index(default_sort), key=f"{key_prefix}_sort")
+    with sort_col2:
+        descending = st.checkbox("Descending", value=default_sort == "submission_time", key=f"{key_prefix}_desc")
+
+    # Any change to filters or sorting starts again from the first page
+    signature = repr((sorted(filters.items()), sort_by, descending))
+    stack_key = f"{key_prefix}_page_stack"
+    if st.session_state.get(f"{key_prefix}_signature") != signature:
+        st.session_state[f"{key_prefix}_signature"] = signature
+        st.session_state[stack_key] = [None]
+    stack = st.session_state[stack_key]
+
+    # Reuse this session's snapshot of the page and only pull rows changed since the last load
+    snapshot_key = f"{key_prefix}_snapshot"
+    page_key = (signature, len(stack), st.session_state.get("admin_refresh_token", 0))
+    snapshot = load_page_snapshot(
+        cursor, table, page_key, st.session_state.get(snapshot_key), now=now,
+        filters=filters, sort_by=sort_by, descending=descending, after=stack[-1]
+    )
+    st.session_state[snapshot_key] = snapshot
+
+    page = dict(snapshot["page"])
+    fresh_df = pd.DataFrame(page["rows"], columns=page["columns"])
+
+    # While the admin has unsaved edits, keep feeding the editor the rows (and row_versions)
+    # they started from: new editor input resets data_editor, and saves check versions
+    # against this frozen copy, so concurrent changes surface as conflicts
+    frozen_key = f"{key_prefix}_frozen"
+    identity = (signature, len(stack))
+    frozen = st.session_state.get(frozen_key)
+    editing = bool(frozen) and frozen["identity"] == identity and _has_pending_edits(frozen["editor_key"])
+    if not editing and (not frozen or frozen["identity"] != identity or not frozen["df"].equals(fresh_df)):
+        # Editor state is positional, so every frozen copy gets its own editor key
+        serial = st.session_state.get(f"{key_prefix}_editor_serial", 0) + 1
+        st.session_state[f"{key_prefix}_editor_serial"] = serial
+        frozen = {"identity": identity, "df": fresh_df,
+                  "editor_key": f"{key_prefix}_editor_{len(stack)}_{abs(hash(signature))}_{serial}"}
+        st.session_state[frozen_key] = frozen
+
+    page["df"] = frozen["df"]
+    page["editor_key"] = frozen["editor_key"]
+    page["stale"] = editing and not frozen["df"].equals(fresh_df)
+    page["number"] = len(stack)
+    return page
+
+def _has_pending_edits(editor_key):
+    editor_state = st.session_state.get(editor_key) or {}
+    return any(editor_state.get(k) for k in ("edited_rows", "added_rows", "deleted_rows"))
+
+def end_admin_edit(key_prefix):
+    """Drop the frozen editor copy after a save or discard so the next run shows fresh rows"""
+    frozen = st.session_state.pop(f"{key_prefix}_frozen", None)
+    if frozen:
+        st.session_state.pop(frozen["editor_key"], None)
+
+def admin_page_navigation(page, key_prefix):
+    stack = st.session_state[f"{key_prefix}_page_stack"]
+    nav1, nav2, nav3, nav4 = st.columns([1, 1, 1, 2])
+    with nav1:
+        if st.button("⬅️ Previous", key=f"{key_prefix}_prev", disabled=len(stack) == 1):
+            stack.pop()
+            st.rerun()
+    with nav2:
+        if st.button("Next ➡️", key=f"{key_prefix}_next", disabled=not page["has_more"]):
+            stack.append(page["next"])
+            st.rerun()
+    with nav3:
+        if st.button("↩️ Discard edits", key=f"{key_prefix}_discard"):
+            end_admin_edit(key_prefix)
+            st.rerun()
+    with nav4:
+        st.caption(f"Page {page['number']} · {len(page['df'])} rows")
+        if page["stale"]:
+            st.caption("⚠️ Rows changed in the database since you started editing; saving reports them as conflicts.")
+
+def display_analytics():
+    """Admin analytics drawn entirely from the pre-aggregated materialized views"""
+    data = load_analytics()
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        if data["refreshed_at"]:
+            st.caption(f"Data as of {data['refreshed_at']:%Y-%m-%d %H:%M:%S %Z}")
+    with col2:
+        if st.button("🔄 Refresh now"):
+            if refresh_analytics() is None:
+                st.info("A refresh is already running.")
+            st.rerun()
+
+    profiles_df = pd.DataFrame(data["profiles"])
+    if not profiles_df.empty:
+        st.subheader("Profile Distribution")
+        st.bar_chart(profiles_df.set_index("profile")[["reviewed", "in_review", "backlog"]])
+        st.subheader("Pending Backlog by Profile")
+        st.dataframe(
+            profiles_df[["profile", "backlog", "in_review", "oldest_backlog"]].sort_values("backlog", ascending=False),
+            use_container_width=True
+        )
+
+    reviewers_df = pd.DataFrame(data["reviewers"])
+    if not reviewers_df.empty:
+        st.subheader("Reviewer Throughput")
+        st.bar_chart(reviewers_df.set_index("reviewer")[["completed", "pending"]])
+        st.dataframe(
+            reviewers_df[["reviewer", "rprofilez", "quota", "completed", "last_7_days", "pending", "last_review_at"]],
+            use_container_width=True
+        )
+
+    turnaround_df = pd.DataFrame(data["turnaround"])
+    if not turnaround_df.empty:
+        st.subheader("Submission → Review Turnaround (hours)")
+        turnaround_df = turnaround_df.set_index("profile")[["reviewed", "p50_hours", "p90_hours", "p99_hours"]]
+        st.dataframe(turnaround_df.round(1), use_container_width=True)
+        st.bar_chart(turnaround_df[["p50_hours", "p90_hours"]].drop(index="All", errors="ignore"))
+
+    assignments_df = pd.DataFrame(data["assignments"])
+    if not assignments_df.empty:
+        st.subheader("Assignment Leases")
+        st.caption("Stale assignments returned to the pool, and time from (re)assignment to first review")
+        assignments_df = assignments_df.set_index("profile")[
+            ["reclaimed", "reclaimed_7_days", "reviewed_after_assignment",
+             "p50_assign_to_review_hours", "p90_assign_to_review_hours"]
+        ]
+        st.dataframe(assignments_df.round(1), use_container_width=True)
+
 def run():
+    # New submissions are allocated in the background as they arrive
+    start_auto_allocation()
+
     # Initialize both session state keys at the very top
     if 'admin_logged_in' not in st.session_state:
         st.session_state.admin_logged_in = False
@@ -706,17 +876,28 @@ def run():
                 
                 pdf_file = st.file_uploader("Upload your Resume (PDF format)", type=["pdf"])
                 if pdf_file is not None and roll_no:
-                    # Enforce 2 MB max
-                    if pdf_file.size > 2 * 1024 * 1024:
+                    # Enforce 2 MB max before reading the upload into memory
+                    if pdf_file.size > MAX_PDF_BYTES:
                         st.error("🚨 File too large—please upload a PDF under 2 MB.")
                     else:
-                        # Always save as <roll_no>.pdf so display_code can find it
-                        save_path = f'./Uploaded_Resumes/{roll_no}.pdf'
-                        with st.spinner('Processing your Resume...'):
-                            os.makedirs(os.path.dirname(save_path), exist_ok=True)
-                            with open(save_path, "wb") as f:
-                                f.write(pdf_file.getbuffer())
-                        show_pdf(save_path)
+                        pdf_bytes = pdf_file.getvalue()
+                        # Every widget change reruns the script with the file still in the uploader,
+                        # so validate and store each distinct upload only once
+                        upload_id = (roll_no, content_hash(pdf_bytes))
+                        upload = st.session_state.get('resume_upload')
+                        if not upload or upload["id"] != upload_id:
+                            # Reject malformed/encrypted/oversized PDFs before any storage or cache work
+                            validation = validate_pdf(pdf_bytes)
+                            if validation["valid"]:
+                                # Always save as <roll_no>.pdf so display_code can find it
+                                with st.spinner('Processing your Resume...'):
+                                    get_storage().put(resume_key(roll_no), pdf_bytes)
+                            upload = {"id": upload_id, "validation": validation}
+                            st.session_state['resume_upload'] = upload
+                        if not upload["validation"]["valid"]:
+                            st.error(f"🚨 {upload['validation']['message']}")
+                        else:
+                            show_pdf(resume_key(roll_no))
 
                 # Move profile selection here, after file upload and preview
                 profile = st.selectbox("Select your target profile:", load_profiles(), 
@@ -760,6 +941,11 @@ def run():
                         else:
                             # All validations passed - proceed with submission
                             insert_data_simple(name, roll_no, email_input, drive_link, profile)
+
+                            # Extract resume text in the background for search/skills
+                            resume_data = get_storage().get(resume_key(roll_no))
+                            if resume_data:
+                                schedule_extraction(roll_no, resume_data)
                             
                             # Send confirmation email
                             email_sent = send_submission_confirmation_email(
@@ -907,37 +1093,88 @@ def run():
 
         # ---- LOGGED IN! ----
         st.success(f"Welcome {st.session_state.admin_user}!")
+
+        start_scheduled_refresh()
+        admin_view = st.radio("View", ["📋 Data Management", "📈 Analytics"], horizontal=True, key="admin_view")
+        if admin_view == "📈 Analytics":
+            try:
+                display_analytics()
+            except Exception as e:
+                display_error_details("Analytics loading failed", e)
+            return
+
+        # Show the result of the last save (the save handlers rerun the page)
+        if 'admin_save_msg' in st.session_state:
+            save_msg = st.session_state.pop('admin_save_msg')
+            if "⚠️" in save_msg:
+                st.warning(save_msg)
+            else:
+                st.info(save_msg)
         
         # Logout button
         if st.button("🚪 Logout"):
             st.session_state.admin_logged_in = False
             st.rerun()
 
+        # 🔎 SEARCH STUDENTS, RESUMES & REVIEWS
+        st.header("**Search 🔎**")
+        search_col1, search_col2 = st.columns([4, 1])
+        with search_col1:
+            search_query = st.text_input(
+                "Search by name, roll number, resume text or review content",
+                key="admin_search_query",
+                placeholder="e.g. 23MF1 or \"machine learning\" -intern"
+            )
+        with search_col2:
+            search_page = st.number_input("Page", min_value=1, value=1, step=1, key="admin_search_page")
+
+        if search_query:
+            try:
+                search_result = search_admin(search_query, page=search_page)
+                if search_result["hits"]:
+                    total_pages = -(-search_result["total"] // SEARCH_PAGE_SIZE)
+                    st.caption(f"{search_result['total']} match(es) — page {search_page} of {total_pages}")
+                    st.dataframe(pd.DataFrame(search_result["hits"]), use_container_width=True)
+                else:
+                    st.info("No matches found.")
+            except Exception as e:
+                display_error_details("Search failed", e)
+
+        st.markdown("---")
+
         # 1) Always re-fetch your tables here
-        with get_db_cursor() as (_, cursor):
+        # TimedCursor adds up the database time of this render for the debug footer
+        with get_db_cursor(cursor_factory=TimedCursor) as (_, cursor):
             try:
+                # Reviewer names, allocation stats and unassigned counts in one round trip
+                overview = load_admin_overview(cursor)
+
                 # 📊 EDITABLE USER DATA
                 st.header("**User's Data (Editable)**")
-                cursor.execute("""
-                    SELECT
-                        id,
-                        name,
-                        roll_no,
-                        email_id,
-                        drive_link,
-                        status_num,
-                        profiles,
-                        assigned_to
-                    FROM user_data
-                """)
-                user_data = cursor.fetchall()
-                user_df = pd.DataFrame(user_data, columns=[
-                    'id', 'name', 'roll_no', 'email_id', 'drive_link', 
-                    'status_num', 'profiles', 'assigned_to'
-                ])
 
                 # Get list of reviewers for the dropdown
-                reviewer_names = load_reviewer_names()
+                reviewer_names = overview["reviewer_names"]
+
+                with st.expander("🔽 Filters", expanded=False):
+                    f1, f2, f3 = st.columns(3)
+                    with f1:
+                        status_filter = st.multiselect("Status", [0, 1, 2], key="user_filter_status")
+                    with f2:
+                        profile_filter = st.multiselect("Profile", load_profiles(), key="user_filter_profiles")
+                    with f3:
+                        assigned_filter = st.selectbox("Assigned To", ["Any", UNASSIGNED] + reviewer_names,
+                                                       key="user_filter_assigned")
+                    user_date_from, user_date_to = date_range_filter("Submission date range", "user_filter_dates")
+                user_filters = {
+                    "status_num": status_filter,
+                    "profiles": profile_filter,
+                    "assigned_to": None if assigned_filter == "Any" else assigned_filter,
+                    "date_from": user_date_from,
+                    "date_to": user_date_to,
+                }
+                user_page = admin_table_page(cursor, "user_data", user_filters, "user_data",
+                                             now=overview["now"])
+                user_df = user_page["df"]
                 
                 # Configure column types for better editing experience
                 column_config = {
@@ -956,6 +1193,8 @@ def run():
                         help="Reviewer who has claimed this CV"
                     ),
                     "drive_link": st.column_config.LinkColumn("Drive Link"),
+                    "submission_time": st.column_config.DatetimeColumn("Submitted", disabled=True),
+                    "row_version": st.column_config.NumberColumn("Version", disabled=True),
                 }
 
                 # 2) Show the editor
@@ -964,79 +1203,41 @@ def run():
                     column_config=column_config,
                     num_rows="dynamic",
                     use_container_width=True,
-                    key="user_data_editor"
+                    key=user_page["editor_key"]
                 )
+                admin_page_navigation(user_page, "user_data")
 
                 # 3) Save button
                 col1, col2 = st.columns([1, 4])
                 with col1:
                     if st.button("💾 Save User Data Changes", type="primary"):
                         try:
-                            # 🔧 FIX: Normalize ID columns to handle int/float mismatch
-                            original_ids = set(user_df['id'].tolist())
-                            edited_ids = {
-                                int(x) for x in edited_user_df['id'].tolist()
-                                if not pd.isna(x)
-                            }
-                            deleted_ids = original_ids - edited_ids
-                            
-                            # Delete removed rows
-                            for deleted_id in deleted_ids:
-                                cursor.execute("DELETE FROM user_data WHERE id = %s", (deleted_id,))
-                            
-                            # Update/Insert rows
-                            for _, row in edited_user_df.iterrows():
-                                if pd.isna(row['id']):
-                                    # New row - INSERT
-                                    cursor.execute("""
-                                        INSERT INTO user_data (name, roll_no, email_id, drive_link, status_num, profiles, assigned_to)
-                                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                                    """, (row['name'], row['roll_no'], row['email_id'], row['drive_link'], 
-                                          row['status_num'], row['profiles'], row['assigned_to']))
-                                else:
-                                    # Existing row - UPDATE
-                                    cursor.execute("""
-                                        UPDATE user_data 
-                                        SET name=%s, roll_no=%s, email_id=%s, drive_link=%s, 
-                                            status_num=%s, profiles=%s, assigned_to=%s
-                                        WHERE id=%s
-                                    """, (row['name'], row['roll_no'], row['email_id'], row['drive_link'],
-                                          row['status_num'], row['profiles'], row['assigned_to'], int(row['id'])))
-                            
-                            st.success("✅ User data saved successfully!")
+                            # Only write the rows the admin actually inserted, edited or deleted
+                            changes = compute_changes(
+                                user_df, edited_user_df,
+                                editor_state=st.session_state.get(user_page["editor_key"]),
+                                columns=list(USER_DATA_COLUMNS)
+                            )
+                            report = bulk_apply_changes(cursor, "user_data", changes, USER_DATA_COLUMNS)
+                            st.session_state['admin_save_msg'] = format_save_report("User data", report)
+                            end_admin_edit("user_data")
+                            # st.rerun() unwinds past get_db_cursor's commit, so commit first
+                            cursor.connection.commit()
                             st.rerun()
                         except Exception as e:
                             st.error(f"❌ Error saving user data: {e}")
 
                 with col2:
-                    st.markdown(get_table_download_link(edited_user_df,'User_Data.csv','📥 Download User Data'), unsafe_allow_html=True)
+                    csv_export_button(cursor, "user_data", "User_Data.csv", "📥 Download User Data")
 
                 st.markdown("---")
 
                 # 👥 EDITABLE REVIEWER DATA  
                 st.header("**Reviewer's Data (Editable)**")
-                cursor.execute("""
-                    SELECT
-                        rd.id,
-                        rd.name,
-                        rd.password,
-                        rd.reviewsnumber,
-                        COALESCE(rv.completed, 0) AS cvsreviewed,
-                        rd.linkedin,
-                        rd.email,
-                        rd.rprofilez
-                    FROM reviewer_data rd
-                    LEFT JOIN (
-                        SELECT reviewer_name, COUNT(*) as completed
-                        FROM reviews_data
-                        GROUP BY reviewer_name
-                    ) rv
-                    ON rv.reviewer_name = rd.name
-                """)
-                reviewer_data = cursor.fetchall()
-                reviewer_df = pd.DataFrame(reviewer_data, columns=[
-                    'id', 'name', 'password', 'reviewsnumber', 'cvsreviewed', 'linkedin', 'email', 'rprofilez'
-                ])
+                domain_filter = st.text_input("Filter by domain", key="reviewer_filter_domain")
+                reviewer_page = admin_table_page(cursor, "reviewer_data", {"domain": domain_filter}, "reviewer_data",
+                                                 now=overview["now"])
+                reviewer_df = reviewer_page["df"]
 
                 reviewer_column_config = {
                     "id": st.column_config.NumberColumn("ID", disabled=True),
@@ -1048,7 +1249,8 @@ def run():
                     ),
                     "linkedin": st.column_config.LinkColumn("LinkedIn Profile"),
                     "email": st.column_config.TextColumn("Email"),
-                    "password": st.column_config.TextColumn("Password", help="Reviewer login password")
+                    "password": st.column_config.TextColumn("Password", help="Reviewer login password"),
+                    "row_version": st.column_config.NumberColumn("Version", disabled=True),
                 }
 
                 edited_reviewer_df = st.data_editor(
@@ -1056,69 +1258,76 @@ def run():
                     column_config=reviewer_column_config,
                     num_rows="dynamic",
                     use_container_width=True,
-                    key="reviewer_data_editor"
+                    key=reviewer_page["editor_key"]
                 )
+                admin_page_navigation(reviewer_page, "reviewer_data")
 
                 col1, col2 = st.columns([1, 4])
                 with col1:
                     if st.button("💾 Save Reviewer Data Changes", type="primary"):
                         try:
-                            # 🔧 FIX: Normalize ID columns
-                            original_ids = set(reviewer_df['id'].tolist())
-                            edited_ids = {
-                                int(x) for x in edited_reviewer_df['id'].tolist()
-                                if not pd.isna(x)
-                            }
-                            deleted_ids = original_ids - edited_ids
-                            
-                            # Delete removed rows
-                            for deleted_id in deleted_ids:
-                                cursor.execute("DELETE FROM reviewer_data WHERE id = %s", (deleted_id,))
-                            
-                            # Update/Insert rows - Note: Cvsreviewed is now derived, not stored
-                            for _, row in edited_reviewer_df.iterrows():
-                                if pd.isna(row['id']):
-                                    # New row - INSERT
-                                    cursor.execute("""
-                                        INSERT INTO reviewer_data (name, password, reviewsnumber, linkedin, email, rprofilez)
-                                        VALUES (%s, %s, %s, %s, %s, %s)
-                                    """, (row['name'], row['password'], row['reviewsnumber'], 
-                                          row['linkedin'], row['email'], row['rprofilez']))
-                                else:
-                                    # Existing row - UPDATE
-                                    cursor.execute("""
-                                        UPDATE reviewer_data 
-                                        SET name=%s, password=%s, reviewsnumber=%s, 
-                                            linkedin=%s, email=%s, rprofilez=%s
-                                        WHERE id=%s
-                                    """, (row['name'], row['password'], row['reviewsnumber'],
-                                          row['linkedin'], row['email'], row['rprofilez'], int(row['id'])))
-                            
-                            st.success("✅ Reviewer data saved successfully!")
+                            # cvsreviewed is derived from reviews_data, so it is never written
+                            changes = compute_changes(
+                                reviewer_df, edited_reviewer_df,
+                                editor_state=st.session_state.get(reviewer_page["editor_key"]),
+                                columns=list(REVIEWER_DATA_COLUMNS)
+                            )
+                            report = bulk_apply_changes(cursor, "reviewer_data", changes, REVIEWER_DATA_COLUMNS)
+                            st.session_state['admin_save_msg'] = format_save_report("Reviewer data", report)
+                            end_admin_edit("reviewer_data")
+                            # st.rerun() unwinds past get_db_cursor's commit, so commit first
+                            cursor.connection.commit()
                             st.rerun()
                         except Exception as e:
                             st.error(f"❌ Error saving reviewer data: {e}")
 
                 with col2:
-                    st.markdown(get_table_download_link(edited_reviewer_df,'Reviewer_Data.csv','📥 Download Reviewer Data'), unsafe_allow_html=True)
+                    csv_export_button(cursor, "reviewer_data", "Reviewer_Data.csv", "📥 Download Reviewer Data")
+
+                st.markdown("---")
+
+                # 📤 BULK IMPORT
+                with st.expander("📤 Bulk Import Reviewers / Students (CSV or Parquet)"):
+                    import_target_label = st.radio("Import into", ["Reviewers", "Students"], horizontal=True,
+                                                   key="import_target")
+                    import_target = "reviewer_data" if import_target_label == "Reviewers" else "user_data"
+                    st.caption("Columns: " + ", ".join(IMPORT_TARGETS[import_target]["columns"]) +
+                               " (required: " + ", ".join(IMPORT_TARGETS[import_target]["required"]) + ")")
+                    update_existing = st.checkbox("Update rows that already exist", key="import_update_existing")
+                    import_file = st.file_uploader("Upload file", type=["csv", "parquet"], key="import_file")
+                    if import_file is not None and st.button("📤 Import", key="import_run"):
+                        try:
+                            import_df = read_import_file(import_file, import_file.name)
+                            valid_df, invalid_df = validate_import(import_df, import_target, load_profiles())
+                            result = import_rows(cursor, valid_df, import_target, update_existing)
+                            cursor.connection.commit()
+                            st.success(f"✅ Imported {result['inserted']} new and updated {result['updated']} "
+                                       f"existing row(s) in {result['seconds'] * 1000:.0f} ms")
+                            if not result["conflicts"].empty:
+                                st.warning(f"⚠️ {len(result['conflicts'])} row(s) already existed")
+                                st.dataframe(result["conflicts"], use_container_width=True)
+                            if not invalid_df.empty:
+                                st.error(f"❌ {len(invalid_df)} row(s) failed validation and were not imported")
+                                st.dataframe(invalid_df, use_container_width=True)
+                        except Exception as e:
+                            cursor.connection.rollback()
+                            st.error(f"❌ Import failed: {e}")
 
                 st.markdown("---")
 
                 # 📝 EDITABLE REVIEWS DATA
                 st.header("**Reviews Data (Editable)**")
-                # 1) Fetch all columns from reviews table including structured sections
-                cursor.execute("""
-                  SELECT
-                    id, name, roll_no, email_id, reviewer_name, reviewer_linkedin, reviewer_email,
-                    drive_link, review, structure_format, domain_relevance, depth_explanation,
-                    language_grammar, project_improvements, additional_suggestions, submission_time
-                  FROM reviews_data
-                  ORDER BY submission_time DESC
-                """)
-                cols = ["id","name","roll_no","email_id","reviewer_name","reviewer_linkedin","reviewer_email",
-                       "drive_link","review","structure_format","domain_relevance","depth_explanation",
-                       "language_grammar","project_improvements","additional_suggestions","submission_time"]
-                reviews_df = pd.DataFrame(cursor.fetchall(), columns=cols)
+                with st.expander("🔽 Filters", expanded=False):
+                    reviewer_filter = st.selectbox("Reviewer", ["Any"] + reviewer_names, key="reviews_filter_reviewer")
+                    reviews_date_from, reviews_date_to = date_range_filter("Review date range", "reviews_filter_dates")
+                reviews_filters = {
+                    "reviewer_name": None if reviewer_filter == "Any" else reviewer_filter,
+                    "date_from": reviews_date_from,
+                    "date_to": reviews_date_to,
+                }
+                reviews_page = admin_table_page(cursor, "reviews_data", reviews_filters, "reviews_data",
+                                                default_sort="submission_time", now=overview["now"])
+                reviews_df = reviews_page["df"]
 
                 reviews_column_config = {
                     "id": st.column_config.NumberColumn("ID", disabled=True),
@@ -1135,6 +1344,7 @@ def run():
                     "project_improvements": st.column_config.TextColumn("Project Improvements", width="large"),
                     "additional_suggestions": st.column_config.TextColumn("Additional Suggestions", width="large"),
                     "submission_time": st.column_config.DatetimeColumn("Submission Time", disabled=True),
+                    "row_version": st.column_config.NumberColumn("Version", disabled=True),
                 }
 
                 edited_reviews_df = st.data_editor(
@@ -1142,76 +1352,34 @@ def run():
                     column_config=reviews_column_config,
                     num_rows="dynamic",
                     use_container_width=True,
-                    key="reviews_data_editor"
+                    key=reviews_page["editor_key"]
                 )
+                admin_page_navigation(reviews_page, "reviews_data")
 
                 col1, col2 = st.columns([1, 4])
                 with col1:
                     if st.button("💾 Save Reviews Data Changes", type="primary"):
                         try:
-                            # Handle row deletions first
-                            original_ids = set(reviews_df['id'].tolist())
-                            edited_ids = {
-                                int(x) for x in edited_reviews_df['id'].tolist()
-                                if not pd.isna(x)
-                            }
-                            deleted_ids = original_ids - edited_ids
-                            
-                            # Delete removed rows
-                            for deleted_id in deleted_ids:
-                                cursor.execute("DELETE FROM reviews_data WHERE id = %s", (deleted_id,))
-                            
-                            # Process each row for insert/update
-                            for _, row in edited_reviews_df.iterrows():
-                                # map blank → None
-                                def norm(v):
-                                    return None if (pd.isna(v) or str(v).strip()=="") else v
-
-                                email_id = norm(row["email_id"])
-                                reviewer_linkedin = norm(row["reviewer_linkedin"])
-                                reviewer_email = norm(row["reviewer_email"])
-                                drive_link = norm(row["drive_link"])
-                                review_text = norm(row["review"])
-                                structure_format = norm(row["structure_format"])
-                                domain_relevance = norm(row["domain_relevance"])
-                                depth_explanation = norm(row["depth_explanation"])
-                                language_grammar = norm(row["language_grammar"])
-                                project_improvements = norm(row["project_improvements"])
-                                additional_suggestions = norm(row["additional_suggestions"])
-
-                                if pd.isna(row["id"]):
-                                    # New row - INSERT (submission_time will be auto-set by database)
-                                    cursor.execute("""
-                                      INSERT INTO reviews_data 
-                                      (name, roll_no, email_id, reviewer_name, reviewer_linkedin, reviewer_email, 
-                                       drive_link, review, structure_format, domain_relevance, depth_explanation,
-                                       language_grammar, project_improvements, additional_suggestions)
-                                      VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                                    """, (row["name"], row["roll_no"], email_id, row["reviewer_name"],
-                                          reviewer_linkedin, reviewer_email, drive_link, review_text,
-                                          structure_format, domain_relevance, depth_explanation,
-                                          language_grammar, project_improvements, additional_suggestions))
-                                else:
-                                    # Existing row - UPDATE (don't update submission_time)
-                                    cursor.execute("""
-                                      UPDATE reviews_data SET 
-                                      name=%s, roll_no=%s, email_id=%s, reviewer_name=%s, 
-                                      reviewer_linkedin=%s, reviewer_email=%s, drive_link=%s, review=%s,
-                                      structure_format=%s, domain_relevance=%s, depth_explanation=%s,
-                                      language_grammar=%s, project_improvements=%s, additional_suggestions=%s
-                                      WHERE id=%s
-                                    """, (row["name"], row["roll_no"], email_id, row["reviewer_name"],
-                                          reviewer_linkedin, reviewer_email, drive_link, review_text,
-                                          structure_format, domain_relevance, depth_explanation,
-                                          language_grammar, project_improvements, additional_suggestions, int(row["id"])))
-                            
-                            st.success("✅ Reviews data saved successfully!")
+                            # Write only the changed rows, and only their changed columns
+                            changes = compute_changes(
+                                reviews_df, edited_reviews_df,
+                                editor_state=st.session_state.get(reviews_page["editor_key"]),
+                                columns=list(REVIEWS_DATA_COLUMNS)
+                            )
+                            report = bulk_apply_changes(
+                                cursor, "reviews_data", changes, REVIEWS_DATA_COLUMNS,
+                                blank_as_null=REVIEWS_BLANK_AS_NULL
+                            )
+                            st.session_state['admin_save_msg'] = format_save_report("Reviews data", report)
+                            end_admin_edit("reviews_data")
+                            # st.rerun() unwinds past get_db_cursor's commit, so commit first
+                            cursor.connection.commit()
                             st.rerun()
                         except Exception as e:
                             st.error(f"❌ Error saving reviews data: {e}")
 
                 with col2:
-                    st.markdown(get_table_download_link(edited_reviews_df,'Reviews_Data.csv','📥 Download Reviews Data'), unsafe_allow_html=True)
+                    csv_export_button(cursor, "reviews_data", "Reviews_Data.csv", "📥 Download Reviews Data")
 
                 st.markdown("---")
 
@@ -1220,31 +1388,22 @@ def run():
                 
                 # Debug section to show domain matching
                 st.subheader("🔍 Domain Debug Information")
-                allocation_stats = get_allocation_stats()
+                allocation_stats = overview["allocation_stats"]
                 if allocation_stats:
                     debug_df = pd.DataFrame([
                         {
                             "Reviewer": stat["name"], 
                             "Domains": stat["rprofilez"],
                             "Capacity": stat["remaining_capacity"],
-                            "Total Assigned": stat["total_assigned"]
+                            "Total Assigned": stat["total_assigned"],
+                            "Leases Lapsed": stat["leases_lapsed_at"]
                         }
                         for stat in allocation_stats
                     ])
                     st.dataframe(debug_df, use_container_width=True)
                 
-                # Get allocation statistics for the download functionality
-                allocation_stats = get_allocation_stats()
-                
                 # Unassigned CVs count
-                with get_db_cursor() as (_, cur):
-                    cur.execute("""
-                        SELECT profiles, COUNT(*) as count
-                        FROM user_data 
-                        WHERE status_num = 1 AND assigned_to IS NULL
-                        GROUP BY profiles
-                    """)
-                    unassigned_stats = cur.fetchall()
+                unassigned_stats = overview["unassigned_by_profile"]
                 
                 if unassigned_stats:
                     st.subheader("Unassigned CVs by Profile")
@@ -1255,21 +1414,33 @@ def run():
                     st.dataframe(unassigned_df, use_container_width=True)
                 
                 # Allocation controls
-                col1, col2, col3 = st.columns(3)
+                allocation_mode = st.radio(
+                    "Allocation mode", list(ALLOCATION_MODES), horizontal=True, key="allocation_mode",
+                    help="greedy: oldest CVs first to the least-loaded reviewer; "
+                         "optimal: solve the whole batch to allocate as many CVs as possible, evenly"
+                )
+                col0, col1, col2, col3 = st.columns(4)
+
+                with col0:
+                    if st.button("🔍 Preview Allocation"):
+                        st.session_state["allocation_preview"] = preview_allocation(allocation_mode, cur=cursor)
                 
                 with col1:
                     if st.button("🚀 Run Smart Allocation", type="primary"):
-                        allocation_result = smart_cv_allocation()
+                        # Runs on the page cursor: commit to apply it and release the allocation lock
+                        allocation_result = smart_cv_allocation(allocation_mode, cur=cursor)
+                        cursor.connection.commit()
                         if allocation_result["allocated"] > 0:
                             st.success(f"✅ {allocation_result['message']}")
                             st.info("Details: " + ", ".join(allocation_result["details"]))
                             st.rerun()
                         else:
-                            st.info("ℹ️ No CVs available for allocation")
+                            st.info(f"ℹ️ {allocation_result['message']}")
                 
                 with col2:
                     if st.button("📊 Refresh Stats"):
-                        # Force refresh of data
+                        # Force a full reload instead of an incremental refresh
+                        st.session_state["admin_refresh_token"] = st.session_state.get("admin_refresh_token", 0) + 1
                         st.rerun()
                 
                 with col3:
@@ -1283,6 +1454,67 @@ def run():
                         else:
                             st.warning("No allocation data available to download.")
 
+                # Dry-run result: review the diff, then apply exactly this plan
+                preview = st.session_state.get("allocation_preview")
+                if preview:
+                    st.subheader(f"Allocation Preview ({preview['mode']})")
+                    age_minutes = (time.time() - preview["created_at"]) / 60
+                    st.caption(f"Would allocate {len(preview['plan'])} of {preview['unassigned']} unassigned CV(s) · "
+                               f"computed {age_minutes:.0f} min ago · nothing has been written yet")
+                    preview_col1, preview_col2 = st.columns(2)
+                    with preview_col1:
+                        st.markdown("**By profile**")
+                        st.dataframe(pd.DataFrame(preview["profiles"]), use_container_width=True)
+                    with preview_col2:
+                        st.markdown("**By reviewer**")
+                        st.dataframe(pd.DataFrame(preview["reviewers"]), use_container_width=True)
+
+                    apply_col, discard_col = st.columns([1, 4])
+                    with apply_col:
+                        if st.button("✅ Apply this plan", type="primary", disabled=not preview["plan"]):
+                            applied = apply_allocation_plan(preview, cur=cursor)
+                            # st.rerun() unwinds past get_db_cursor's commit, so commit first
+                            cursor.connection.commit()
+                            if applied["busy"]:
+                                st.info("ℹ️ Allocation is already running, try again in a moment")
+                            else:
+                                st.session_state.pop("allocation_preview")
+                                msg = f"✅ Applied allocation plan: {applied['allocated']} CV(s) assigned"
+                                if applied["skipped"]:
+                                    msg += f"\n\n⚠️ {applied['skipped']} CV(s) changed since the preview and were skipped"
+                                if applied["stale_reviewers"]:
+                                    msg += (f"\n\n⚠️ Load changed since the preview for: {', '.join(applied['stale_reviewers'])}"
+                                            " — their CVs were left unassigned")
+                                st.session_state['admin_save_msg'] = msg
+                                st.rerun()
+                    with discard_col:
+                        if st.button("✖️ Discard preview"):
+                            st.session_state.pop("allocation_preview")
+                            st.rerun()
+
+                st.markdown("---")
+
+                # 📦 COLUMNAR EXPORT FOR ANALYSTS
+                st.header("**Season Export (Parquet) 📦**")
+                st.caption("user_data, reviewer_data, reviews_data and the allocation report as zstd-compressed Parquet files.")
+                if st.button("📦 Prepare Parquet Export"):
+                    # download_button only takes bytes/str/BytesIO, not the spooled temp file
+                    with export_season_parquet_zip(cursor.connection) as bundle:
+                        st.session_state["export_parquet"] = bundle.read()
+                if st.session_state.get("export_parquet") is not None:
+                    st.download_button(
+                        "⬇️ Save season_export.zip",
+                        data=st.session_state["export_parquet"],
+                        file_name="season_export.zip",
+                        mime="application/zip",
+                        key="export_parquet_download"
+                    )
+
+                st.markdown("---")
+                st.caption(f"🛠️ Debug: {cursor.statements} database statement(s), "
+                           f"{cursor.db_seconds * 1000:.0f} ms database time on the page cursor "
+                           "(search, analytics and the Parquet export bypass it and are not counted)")
+
             except Exception as e:
                 display_error_details("Admin dashboard data loading failed", e)
     else:
@@ -1306,6 +1538,10 @@ def run():
                             )
                             row = cursor.fetchone()
                             if row and ad_password == row['password']:
+                                # Logging in keeps this reviewer's assigned CVs from being reclaimed
+                                renew_assignment_leases(cursor, row['name'])
+                                # st.rerun() unwinds past get_db_cursor's commit, so commit first
+                                conn.commit()
                                 st.session_state['logged_in'] = True
                                 st.session_state['ad_user'] = row['name']  # Use the exact name from DB
                                 st.success(f"Welcome {row['name']}!")
@@ -1360,14 +1596,26 @@ def run():
                 st.metric("Your Domain", domain)
 
             # 🚀 NEW: Admin allocation control
-            if st.button("🔄 Run Smart Allocation", help="Automatically assign unassigned CVs to best reviewers"):
-                allocation_result = smart_cv_allocation()
-                if allocation_result["allocated"] > 0:
-                    st.success(f"✅ {allocation_result['message']}")
-                    if st.session_state.show_performance:
-                        st.info("Allocation details: " + ", ".join(allocation_result["details"]))
-                else:
-                    st.info("ℹ️ No CVs available for allocation")
+            claim_col, allocate_col = st.columns(2)
+            with claim_col:
+                if st.button("📥 Claim next CV", type="primary", help="Take the oldest unassigned CV in your domains"):
+                    claimed = claim_next_cv(ad_user)
+                    if claimed:
+                        st.session_state['review_success_msg'] = (
+                            f"✅ Claimed {claimed['name']} ({claimed['roll_no']}, {claimed['profiles']})"
+                        )
+                        st.rerun()
+                    else:
+                        st.info("ℹ️ No unassigned CV in your domains right now, or your queue is already full.")
+            with allocate_col:
+                if st.button("🔄 Run Smart Allocation", help="Automatically assign unassigned CVs to best reviewers"):
+                    allocation_result = smart_cv_allocation()
+                    if allocation_result["allocated"] > 0:
+                        st.success(f"✅ {allocation_result['message']}")
+                        if st.session_state.show_performance:
+                            st.info("Allocation details: " + ", ".join(allocation_result["details"]))
+                    else:
+                        st.info(f"ℹ️ {allocation_result['message']}")
 
             st.info(f"📝 You can review **{remaining}** more CV(s) in **{domain}**.")
 
@@ -1376,7 +1624,7 @@ def run():
 
             if not cvs:
                 st.warning("No CVs assigned to you right now.")
-                st.info("💡 Click 'Run Smart Allocation' to get new CVs or wait for admin to assign them.")
+                st.info("💡 Click 'Claim next CV' to pick up work, or wait for new CVs to be assigned to you.")
                 return
 
             # 4️⃣ Loop & render one form per CV
@@ -1410,7 +1658,7 @@ def run():
                     st.write(f"{status_emoji} {status_text}")
                 
                 try:
-                    show_pdf(f"./Uploaded_Resumes/{roll}.pdf")
+                    show_pdf(resume_key(roll))
                 except FileNotFoundError:
                     st.warning("📄 PDF preview not available locally.")
                     st.markdown(f"[View on Drive]({link})")
@@ -1582,113 +1830,6 @@ def run():
 
 # ========== IMPROVED CV ALLOCATION SYSTEM ==========
 
-def get_allocation_stats():
-    """Get current allocation statistics for load balancing"""
-    try:
-        with get_db_cursor() as (_, cur):
-            cur.execute("""
-                SELECT 
-                    r.name,
-                    r.rprofilez,
-                    r.reviewsnumber,
-                    COALESCE(rv.completed, 0) as completed_reviews,
-                    COALESCE(rv.completed, 0) + COALESCE(pending.pending_count, 0) as total_assigned,
-                    r.reviewsnumber - COALESCE(rv.completed, 0) as remaining_capacity
-                FROM reviewer_data r
-                LEFT JOIN (
-                    SELECT reviewer_name, COUNT(*) as completed
-                    FROM reviews_data
-                    GROUP BY reviewer_name
-                ) rv ON rv.reviewer_name = r.name
-                LEFT JOIN (
-                    SELECT assigned_to, COUNT(*) as pending_count
-                    FROM user_data 
-                    WHERE status_num = 1 AND assigned_to IS NOT NULL
-                    GROUP BY assigned_to
-                ) pending ON pending.assigned_to = r.name
-                WHERE r.reviewsnumber > COALESCE(rv.completed, 0)
-                ORDER BY r.rprofilez, total_assigned ASC
-            """)
-            return cur.fetchall()
-    except Exception as e:
-        print(f"Error getting allocation stats: {e}")
-        return []
-
-def smart_cv_allocation():
-    """Intelligent CV allocation system with load balancing"""
-    with get_db_cursor() as (_, cur):
-        # Get unassigned CVs by profile
-        cur.execute("""
-            SELECT roll_no, profiles
-            FROM user_data 
-            WHERE status_num = 1 AND assigned_to IS NULL
-            ORDER BY profiles, id ASC
-        """)
-        unassigned_cvs = cur.fetchall()
-        
-        if not unassigned_cvs:
-            return {"allocated": 0, "message": "No unassigned CVs"}
-        
-        # Get available reviewers
-        allocation_stats = get_allocation_stats()
-        
-        allocated_count = 0
-        allocations_made = []
-        
-        for cv in unassigned_cvs:
-            roll_no = cv["roll_no"]
-            profile = cv["profiles"]
-            
-            # Find best reviewer for this profile
-            best_reviewer = None
-            min_workload = float('inf')
-            
-            for reviewer in allocation_stats:
-                # Handle comma-separated domains in reviewer profiles
-                reviewer_domains = [domain.strip() for domain in (reviewer["rprofilez"] or "").split(",")]
-                
-                # Check if the user's profile matches any of the reviewer's domains
-                profile_match = False
-                for domain in reviewer_domains:
-                    # Normalize both strings for comparison (handle Finance-Quant vs Finance/Quant)
-                    normalized_domain = domain.replace("/", "-").replace("-", "/").lower()
-                    normalized_profile = profile.replace("/", "-").replace("-", "/").lower()
-                    
-                    if (domain.lower() == profile.lower() or 
-                        normalized_domain == normalized_profile.lower() or
-                        profile.lower() in domain.lower() or 
-                        domain.lower() in profile.lower()):
-                        profile_match = True
-                        break
-                
-                if (profile_match and 
-                    reviewer["remaining_capacity"] > 0 and
-                    reviewer["total_assigned"] < min_workload):
-                    best_reviewer = reviewer["name"]
-                    min_workload = reviewer["total_assigned"]
-            
-            if best_reviewer:
-                # Assign CV to best reviewer
-                cur.execute(
-                    "UPDATE user_data SET assigned_to = %s WHERE roll_no = %s",
-                    (best_reviewer, roll_no)
-                )
-                allocated_count += 1
-                allocations_made.append(f"{roll_no} → {best_reviewer}")
-                
-                # Update local stats to prevent double-assignment in this batch
-                for reviewer in allocation_stats:
-                    if reviewer["name"] == best_reviewer:
-                        reviewer["total_assigned"] += 1
-                        reviewer["remaining_capacity"] -= 1
-                        break
-        
-        return {
-            "allocated": allocated_count,
-            "message": f"Allocated {allocated_count} CVs",
-            "details": allocations_made
-        }
-
 @timing_decorator
 def get_reviewer_assigned_cvs(reviewer_name: str, max_capacity: int):
     """Get CVs assigned to a specific reviewer with structured review data"""
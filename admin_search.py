@@ -0,0 +1,96 @@
+from database_pool import get_db_cursor
+
+SEARCH_PAGE_SIZE = 20
+
+# Name/roll number branch: fuzzy trigram matching when pg_trgm is installed (init_db
+# tries to create it), plain ILIKE otherwise; both rank above full-text hits
+_NAME_TRGM_SQL = """
+        SELECT roll_no, 'Name/Roll' AS source,
+               GREATEST(similarity(name, %(q)s), similarity(roll_no, %(q)s)) * 2 AS rank
+          FROM user_data
+         WHERE name %% %(q)s OR roll_no %% %(q)s OR roll_no ILIKE %(prefix)s
+"""
+_NAME_ILIKE_SQL = """
+        SELECT roll_no, 'Name/Roll' AS source,
+               CASE WHEN name ILIKE %(prefix)s OR roll_no ILIKE %(prefix)s THEN 2 ELSE 1 END AS rank
+          FROM user_data
+         WHERE name ILIKE %(contains)s OR roll_no ILIKE %(prefix)s
+"""
+
+# Each branch is served by an index: trigram GIN on user_data.name/roll_no (with
+# pg_trgm), GIN on resume_text.search_vector and reviews_data.search_vector.
+_SEARCH_SQL = """
+    WITH q AS (SELECT websearch_to_tsquery('english', %(q)s) AS tsq),
+    hits AS (
+        {name_branch}
+        UNION ALL
+        SELECT rt.roll_no, 'Resume' AS source, ts_rank_cd(rt.search_vector, q.tsq) AS rank
+          FROM resume_text rt, q
+         WHERE rt.search_vector @@ q.tsq
+        UNION ALL
+        SELECT rd.roll_no, 'Review' AS source, ts_rank_cd(rd.search_vector, q.tsq) AS rank
+          FROM reviews_data rd, q
+         WHERE rd.search_vector @@ q.tsq
+    ),
+    ranked AS (
+        SELECT roll_no,
+               MAX(rank) AS rank,
+               STRING_AGG(DISTINCT source, ', ') AS matched_in
+          FROM hits
+         WHERE roll_no IS NOT NULL
+         GROUP BY roll_no
+    )
+    SELECT r.roll_no, u.name, u.profiles, u.status_num, u.assigned_to,
+           r.matched_in, ROUND(r.rank::numeric, 4) AS rank,
+           (SELECT STRING_AGG(skill, ', ' ORDER BY skill)
+              FROM resume_skills rs WHERE rs.roll_no = r.roll_no) AS skills,
+           COUNT(*) OVER () AS total
+      FROM ranked r
+      LEFT JOIN LATERAL (
+            SELECT name, profiles, status_num, assigned_to
+              FROM user_data WHERE roll_no = r.roll_no
+             ORDER BY id DESC LIMIT 1
+      ) u ON TRUE
+     ORDER BY r.rank DESC, r.roll_no
+     LIMIT %(limit)s OFFSET %(offset)s
+"""
+
+
+_trgm_available = None
+
+
+def _has_trgm(cur):
+    """Whether pg_trgm is installed; checked once per process"""
+    global _trgm_available
+    if _trgm_available is None:
+        cur.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') AS installed")
+        _trgm_available = cur.fetchone()["installed"]
+    return _trgm_available
+
+
+def search_admin(query: str, page: int = 1, page_size: int = SEARCH_PAGE_SIZE):
+    """
+    Ranked full-text + fuzzy search across students, resume text and reviews.
+    Returns {"total": int, "hits": [dict, ...]} for the requested page only.
+    """
+    query = (query or "").strip()
+    if not query:
+        return {"total": 0, "hits": []}
+
+    page = max(1, int(page))
+    escaped = query.replace("%", r"\%").replace("_", r"\_")
+    params = {
+        "q": query,
+        "prefix": escaped + "%",
+        "contains": "%" + escaped + "%",
+        "limit": page_size,
+        "offset": (page - 1) * page_size,
+    }
+    with get_db_cursor() as (_, cur):
+        name_branch = _NAME_TRGM_SQL if _has_trgm(cur) else _NAME_ILIKE_SQL
+        cur.execute(_SEARCH_SQL.format(name_branch=name_branch), params)
+        rows = cur.fetchall()
+
+    total = rows[0]["total"] if rows else 0
+    hits = [{k: v for k, v in row.items() if k != "total"} for row in rows]
+    return {"total": total, "hits": hits}
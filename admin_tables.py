@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Admin table pages: keyset pagination, filters and incremental page snapshots.
+
+Check that keyset paging over every sort column (NULLs included) returns each
+row exactly once, on a scratch database with the app schema; the seeded rows
+are rolled back:
+    python admin_tables.py --check-paging --dsn postgresql://localhost/cv_sim
+"""
+
+import argparse
+import datetime
+import os
+import sys
+
+from allocation import ALLOCATION_STATS_SQL
+
+ADMIN_PAGE_SIZE = 50
+UNASSIGNED = "— Unassigned —"
+# Delta queries look back a little past the last sync so rows from transactions
+# that committed just after it are not missed; merging is idempotent
+SYNC_OVERLAP = datetime.timedelta(seconds=5)
+
+# Nullable sort columns are paged on (column IS NULL, COALESCE(column, fill), id) so
+# NULLs sort last and the keyset comparison never meets a NULL; fill is per type
+NULL_SORT_FILL = {"timestamptz": "'-infinity'::timestamptz", "text": "''::text"}
+
+# Per-table SELECT, sortable columns and supported filters. Every sort column is
+# backed by a (column, id) index created in init_db, or the matching expression
+# index for the nullable ones, so keyset pages stay cheap.
+TABLE_SPECS = {
+    "user_data": {
+        "select": """
+            SELECT t.id, t.name, t.roll_no, t.email_id, t.drive_link, t.status_num,
+                   t.profiles, t.assigned_to, t.submission_time, t.row_version
+              FROM user_data t
+        """,
+        "columns": ["id", "name", "roll_no", "email_id", "drive_link", "status_num",
+                    "profiles", "assigned_to", "submission_time", "row_version"],
+        "sortable": ["id", "submission_time", "name", "roll_no"],
+        "nullable_sort": {"submission_time": "timestamptz"},
+        "filters": {"status_num", "profiles", "assigned_to", "date_from", "date_to"},
+    },
+    "reviewer_data": {
+        "select": """
+            SELECT t.id, t.name, t.password, t.reviewsnumber,
+                   COALESCE(rv.completed, 0) AS cvsreviewed,
+                   t.linkedin, t.email, t.rprofilez, t.row_version
+              FROM reviewer_data t
+              LEFT JOIN LATERAL (
+                    SELECT COUNT(*) AS completed FROM reviews_data WHERE reviewer_name = t.name
+              ) rv ON TRUE
+        """,
+        "columns": ["id", "name", "password", "reviewsnumber", "cvsreviewed", "linkedin", "email", "rprofilez",
+                    "row_version"],
+        "sortable": ["id", "name"],
+        "filters": {"domain"},
+        # cvsreviewed is derived from reviews_data
+        "depends_on": ["reviews_data"],
+    },
+    "reviews_data": {
+        "select": """
+            SELECT t.id, t.name, t.roll_no, t.email_id, t.reviewer_name, t.reviewer_linkedin,
+                   t.reviewer_email, t.drive_link, t.review, t.structure_format, t.domain_relevance,
+                   t.depth_explanation, t.language_grammar, t.project_improvements,
+                   t.additional_suggestions, t.submission_time, t.row_version
+              FROM reviews_data t
+        """,
+        "columns": ["id", "name", "roll_no", "email_id", "reviewer_name", "reviewer_linkedin",
+                    "reviewer_email", "drive_link", "review", "structure_format", "domain_relevance",
+                    "depth_explanation", "language_grammar", "project_improvements",
+                    "additional_suggestions", "submission_time", "row_version"],
+        "sortable": ["submission_time", "id", "roll_no"],
+        "nullable_sort": {"submission_time": "timestamptz", "roll_no": "text"},
+        "filters": {"reviewer_name", "date_from", "date_to"},
+    },
+}
+
+
+# Everything the admin dashboard needs besides the editable pages, in one statement.
+# now is taken first so page snapshots synced from it never miss a later change.
+ADMIN_OVERVIEW_SQL = f"""
+    SELECT clock_timestamp() AS now,
+           ARRAY(SELECT DISTINCT name FROM reviewer_data ORDER BY name) AS reviewer_names,
+           (SELECT COALESCE(json_agg(s), '[]') FROM ({ALLOCATION_STATS_SQL}) s) AS allocation_stats,
+           (SELECT COALESCE(json_agg(u ORDER BY u.profiles), '[]')
+              FROM (SELECT profiles, COUNT(*) AS count
+                      FROM user_data
+                     WHERE status_num = 1 AND assigned_to IS NULL
+                     GROUP BY profiles) u) AS unassigned_by_profile
+"""
+
+
+def load_admin_overview(cur):
+    """
+    Fetch reviewer names, allocation stats and unassigned-by-profile counts in a
+    single round trip. Returns {"now", "reviewer_names", "allocation_stats", "unassigned_by_profile"}.
+    """
+    cur.execute(ADMIN_OVERVIEW_SQL)
+    return dict(cur.fetchone())
+
+
+def _build_where(spec, filters):
+    clauses, params = [], []
+    filters = {k: v for k, v in (filters or {}).items() if k in spec["filters"] and v not in (None, "", [])}
+
+    if "status_num" in filters:
+        clauses.append("t.status_num = ANY(%s)")
+        params.append(list(filters["status_num"]))
+    if "profiles" in filters:
+        clauses.append("t.profiles = ANY(%s)")
+        params.append(list(filters["profiles"]))
+    if "assigned_to" in filters:
+        if filters["assigned_to"] == UNASSIGNED:
+            clauses.append("t.assigned_to IS NULL")
+        else:
+            clauses.append("t.assigned_to = %s")
+            params.append(filters["assigned_to"])
+    if "reviewer_name" in filters:
+        clauses.append("t.reviewer_name = %s")
+        params.append(filters["reviewer_name"])
+    if "domain" in filters:
+        # Match on canonical keys so "Finance-Quant" also finds "Finance/Quant"
+        clauses.append("""EXISTS (SELECT 1 FROM reviewer_domains d
+                                   WHERE d.reviewer_id = t.id
+                                     AND d.profile_key LIKE '%%' || canonical_profile(%s) || '%%')""")
+        params.append(filters["domain"])
+    if "date_from" in filters:
+        clauses.append("t.submission_time >= %s")
+        params.append(filters["date_from"])
+    if "date_to" in filters:
+        clauses.append("t.submission_time < %s")
+        params.append(filters["date_to"] + datetime.timedelta(days=1))
+    return clauses, params
+
+
+def fetch_page(cur, table, filters=None, sort_by="id", descending=False, after=None, page_size=ADMIN_PAGE_SIZE):
+    """
+    Fetch one keyset-paginated page of an admin table.
+    after is the (sort_value, id) of the last row on the previous page.
+    Returns {"rows", "columns", "next", "has_more"}; next is the cursor for the following page.
+    """
+    spec = TABLE_SPECS[table]
+    if sort_by not in spec["sortable"]:
+        sort_by = spec["sortable"][0]
+
+    clauses, params = _build_where(spec, filters)
+    direction = "DESC" if descending else "ASC"
+    op = "<" if descending else ">"
+    null_type = spec.get("nullable_sort", {}).get(sort_by)
+    if null_type:
+        fill = NULL_SORT_FILL[null_type]
+        is_null, key = f"(t.{sort_by} IS NULL)", f"COALESCE(t.{sort_by}, {fill})"
+        after_is_null, after_key = f"(%s::{null_type} IS NULL)", f"COALESCE(%s::{null_type}, {fill})"
+        # NULLs go last in both directions, so only the value part of the key is reversed
+        order = f"{is_null}, {key} {direction}, t.id {direction}"
+        if after is not None:
+            clauses.append(f"""({is_null} > {after_is_null}
+                             OR ({is_null} = {after_is_null} AND ({key}, t.id) {op} ({after_key}, %s)))""")
+            params.extend((after[0], after[0], after[0], after[1]))
+    else:
+        order = f"t.id {direction}" if sort_by == "id" else f"t.{sort_by} {direction}, t.id {direction}"
+        if after is not None:
+            if sort_by == "id":
+                clauses.append(f"t.id {op} %s")
+                params.append(after[1])
+            else:
+                clauses.append(f"(t.{sort_by}, t.id) {op} (%s, %s)")
+                params.extend(after)
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    cur.execute(f"{spec['select']} {where} ORDER BY {order} LIMIT %s", (*params, page_size + 1))
+    rows = cur.fetchall()
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = (rows[-1][sort_by], rows[-1]["id"]) if rows and has_more else None
+    return {"rows": rows, "columns": spec["columns"], "next": next_cursor, "has_more": has_more}
+
+
+def _has_changes(cur, table, since):
+    cur.execute(f"""
+        SELECT EXISTS (SELECT 1 FROM {table} WHERE updated_at > %s)
+            OR EXISTS (SELECT 1 FROM row_tombstones WHERE table_name = %s AND deleted_at > %s) AS changed
+    """, (since, table, since))
+    return cur.fetchone()["changed"]
+
+
+def fetch_changes(cur, table, since, filters=None, ids=()):
+    """
+    Rows of table updated or inserted after since that match filters, plus ids
+    deleted after since. Changed rows among ids are returned even when they no
+    longer match; each row carries in_filter so callers can spot them.
+    """
+    spec = TABLE_SPECS[table]
+    clauses, params = _build_where(spec, filters)
+    matches = " AND ".join(clauses) or "TRUE"
+    cur.execute(f"""
+        SELECT * FROM (
+            SELECT t.*, ({matches}) AS in_filter
+              FROM ({spec['select']} WHERE t.updated_at > %s) t
+        ) c
+         WHERE c.in_filter OR c.id = ANY(%s)
+    """, (*params, since, list(ids)))
+    changed = cur.fetchall()
+    cur.execute(
+        "SELECT row_id FROM row_tombstones WHERE table_name = %s AND deleted_at > %s",
+        (table, since)
+    )
+    deleted = {r["row_id"] for r in cur.fetchall()}
+    return changed, deleted
+
+
+def load_page_snapshot(cur, table, page_key, snapshot=None, now=None, **page_args):
+    """
+    Return an up-to-date snapshot of one admin page.
+    A snapshot for the same page_key is refreshed with a delta query: rows
+    changed since the last sync are merged in place, and the page is only
+    re-read when a matching row appeared, a page row was deleted, stopped
+    matching the filters or had its sort column changed.
+    snapshot["generation"] changes whenever the row set changes.
+    now may be a database timestamp the caller already read in this transaction.
+    """
+    if now is None:
+        cur.execute("SELECT clock_timestamp() AS now")
+        now = cur.fetchone()["now"]
+
+    if snapshot and snapshot["page_key"] == page_key:
+        since = snapshot["synced_at"] - SYNC_OVERLAP
+        depends_changed = any(_has_changes(cur, dep, since) for dep in TABLE_SPECS[table].get("depends_on", ()))
+        if not depends_changed:
+            rows = snapshot["page"]["rows"]
+            positions = {row["id"]: i for i, row in enumerate(rows)}
+            changed, deleted = fetch_changes(cur, table, since, page_args.get("filters"), positions.keys())
+            sort_by = page_args.get("sort_by", "id")
+            in_place = not deleted & positions.keys() and all(
+                row["in_filter"] and row["id"] in positions and row[sort_by] == rows[positions[row["id"]]][sort_by]
+                for row in changed
+            )
+            if in_place:
+                for row in changed:
+                    del row["in_filter"]
+                    rows[positions[row["id"]]] = row
+                snapshot["synced_at"] = now
+                snapshot["delta_rows"] = len(changed)
+                return snapshot
+
+    page = fetch_page(cur, table, **page_args)
+    generation = (snapshot or {}).get("generation", 0)
+    if not snapshot or [r["id"] for r in snapshot["page"]["rows"]] != [r["id"] for r in page["rows"]]:
+        generation += 1
+    return {"page_key": page_key, "page": page, "synced_at": now, "generation": generation, "delta_rows": None}
+
+
+def check_keyset_paging(cur, table, page_size=3):
+    """
+    Walk every sort column of table in both directions, page by page, and
+    compare with one unpaged ORDER BY. Returns a list of mismatch descriptions.
+    """
+    problems = []
+    for sort_by in TABLE_SPECS[table]["sortable"]:
+        for descending in (False, True):
+            expected = [r["id"] for r in fetch_page(cur, table, sort_by=sort_by, descending=descending,
+                                                    page_size=1_000_000)["rows"]]
+            seen, after, pages = [], None, 0
+            while True:
+                page = fetch_page(cur, table, sort_by=sort_by, descending=descending, after=after,
+                                  page_size=page_size)
+                seen.extend(r["id"] for r in page["rows"])
+                pages += 1
+                if not page["has_more"]:
+                    break
+                after = page["next"]
+            if seen != expected:
+                problems.append(f"{table} by {sort_by} {'DESC' if descending else 'ASC'}: "
+                                f"{len(seen)} row(s) over {pages} page(s), expected {len(expected)}")
+    return problems
+
+
+def _seed_paging_rows(cur):
+    """Rows with NULL and duplicate sort values so paging crosses the NULL boundary"""
+    cur.execute("""
+        INSERT INTO user_data (name, roll_no, status_num, submission_time) VALUES
+            ('Paging A', 'PG0001', 0, NULL), ('Paging B', 'PG0002', 0, NULL),
+            ('Paging C', 'PG0003', 0, '2024-01-01'), ('Paging D', 'PG0004', 0, '2024-01-01'),
+            ('Paging E', 'PG0005', 0, NULL)
+    """)
+    cur.execute("""
+        INSERT INTO reviews_data (name, roll_no, submission_time) VALUES
+            ('Paging A', NULL, NULL), ('Paging B', NULL, '2024-01-01'),
+            ('Paging C', 'PG0003', NULL), ('Paging D', 'PG0004', '2024-01-02'),
+            ('Paging E', NULL, '2024-01-02')
+    """)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check keyset paging of the admin tables")
+    parser.add_argument("--check-paging", action="store_true", help="Page every sort column and compare")
+    parser.add_argument("--dsn", help="Scratch Postgres DSN (never the app's DATABASE_URL)")
+    args = parser.parse_args(argv)
+    if not args.check_paging:
+        parser.print_help()
+        return 0
+
+    import psycopg2
+    from psycopg2.extras import RealDictCursor
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    if not args.dsn:
+        parser.error("--check-paging needs --dsn pointing at a scratch database")
+    if args.dsn == os.getenv("DATABASE_URL"):
+        parser.error("--dsn is the app's DATABASE_URL; use a scratch database")
+
+    conn = psycopg2.connect(args.dsn)
+    try:
+        cur = conn.cursor(cursor_factory=RealDictCursor)
+        _seed_paging_rows(cur)
+        problems = [p for table in TABLE_SPECS for p in check_keyset_paging(cur, table)]
+    finally:
+        conn.rollback()
+        conn.close()
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    if not problems:
+        print("✅ Keyset paging matches the unpaged order for every sort column")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+CV allocation: per-profile least-loaded reviewer selection, applied in one bulk write.
+
+Run one allocation pass:
+    python allocation.py
+
+Benchmark the planners on synthetic data with allocation_sim.py.
+
+Return CVs with expired assignment leases to the pool (also done by the
+auto-allocation sweep):
+    python allocation.py --reclaim
+"""
+
+import argparse
+import heapq
+import sys
+import time
+from contextlib import contextmanager
+
+# Arbitrary app-wide key for pg_try_advisory_xact_lock; one allocation run at a time
+ALLOCATION_LOCK_KEY = 7_310_044
+
+# Per-reviewer load: completed reviews, pending assignments and remaining quota.
+# Pending CVs count against the quota, the same as claim_next_cv, so repeated
+# runs never hand a reviewer more than quota - completed - pending
+ALLOCATION_STATS_SQL = """
+    SELECT
+        r.name,
+        r.rprofilez,
+        r.reviewsnumber,
+        r.leases_lapsed_at,
+        COALESCE(rv.completed, 0) as completed_reviews,
+        COALESCE(rv.completed, 0) + COALESCE(pending.pending_count, 0) as total_assigned,
+        r.reviewsnumber - COALESCE(rv.completed, 0) - COALESCE(pending.pending_count, 0) as remaining_capacity
+    FROM reviewer_data r
+    LEFT JOIN (
+        SELECT reviewer_name, COUNT(*) as completed
+        FROM reviews_data
+        GROUP BY reviewer_name
+    ) rv ON rv.reviewer_name = r.name
+    LEFT JOIN (
+        SELECT assigned_to, COUNT(*) as pending_count
+        FROM user_data
+        WHERE status_num = 1 AND assigned_to IS NOT NULL
+        GROUP BY assigned_to
+    ) pending ON pending.assigned_to = r.name
+    WHERE r.reviewsnumber > COALESCE(rv.completed, 0)
+    ORDER BY r.rprofilez, total_assigned ASC
+"""
+
+
+# Allocator input: reviewer load plus the canonical domain keys from reviewer_domains,
+# leaving out reviewers whose leases lapsed and who have not logged in since.
+# The order breaks greedy ties, so it is total and byte-wise (COLLATE "C") to match
+# reviewer_allocation_order and stay reproducible across databases
+ALLOCATION_CANDIDATES_SQL = f"""
+    SELECT s.*,
+           ARRAY(SELECT d.profile_key
+                   FROM reviewer_domains d
+                   JOIN reviewer_data r ON r.id = d.reviewer_id
+                  WHERE r.name = s.name) AS domains
+      FROM ({ALLOCATION_STATS_SQL}) s
+     WHERE s.leases_lapsed_at IS NULL
+     ORDER BY s.rprofilez COLLATE "C", s.total_assigned, s.name COLLATE "C"
+"""
+
+
+def canonical_profile(value: str) -> str:
+    """Canonical profile key, same as the canonical_profile() SQL function ("Finance-Quant" -> "finance/quant")"""
+    return (value or "").replace("-", "/").strip().lower()
+
+
+def cv_allocation_order(cv):
+    """Sort key matching _read_allocation_input's ORDER BY (NULL profiles last)"""
+    return (cv["profiles"] is None, cv["profiles"] or "", cv["id"])
+
+
+def reviewer_allocation_order(reviewer):
+    """Sort key matching ALLOCATION_CANDIDATES_SQL's ORDER BY (NULL rprofilez last)"""
+    return (reviewer["rprofilez"] is None, reviewer["rprofilez"] or "", reviewer["total_assigned"], reviewer["name"])
+
+
+def reviewer_domain_keys(reviewer):
+    """A reviewer's canonical domain keys: "domains" from ALLOCATION_CANDIDATES_SQL, else parsed from rprofilez"""
+    keys = reviewer.get("domains")
+    if keys is None:
+        keys = {canonical_profile(d) for d in (reviewer["rprofilez"] or "").split(",")} - {""}
+    return keys
+
+
+class ReviewerLoadHeaps:
+    """
+    One min-heap of reviewers per canonical profile, keyed by (total_assigned,
+    reviewer order), so the least-loaded reviewer with capacity is found in
+    O(log n). A multi-domain reviewer sits in several heaps that share one load
+    record; an entry whose load went stale through another heap is re-pushed
+    with its current load when it reaches the top.
+    """
+
+    def __init__(self, reviewers):
+        self.reviewers = [dict(r) for r in reviewers]
+        self._heaps = {}
+        for order, reviewer in enumerate(self.reviewers):
+            if reviewer["remaining_capacity"] <= 0:
+                continue
+            for key in reviewer_domain_keys(reviewer):
+                self._heaps.setdefault(key, []).append((reviewer["total_assigned"], order))
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+
+    def assign(self, profile):
+        """Give one CV of profile to its least-loaded reviewer; returns that reviewer or None"""
+        heap = self._heaps.get(canonical_profile(profile))
+        while heap:
+            load, order = heap[0]
+            reviewer = self.reviewers[order]
+            if reviewer["remaining_capacity"] <= 0:
+                heapq.heappop(heap)
+            elif load != reviewer["total_assigned"]:
+                heapq.heapreplace(heap, (reviewer["total_assigned"], order))
+            else:
+                reviewer["total_assigned"] += 1
+                reviewer["remaining_capacity"] -= 1
+                if reviewer["remaining_capacity"] > 0:
+                    heapq.heapreplace(heap, (reviewer["total_assigned"], order))
+                else:
+                    heapq.heappop(heap)
+                return reviewer
+        return None
+
+
+def plan_allocation(cvs, reviewers):
+    """
+    Compute the full greedy assignment in memory.
+    cvs are {"id", "roll_no", "profiles"} in allocation order; reviewers are
+    ALLOCATION_CANDIDATES_SQL rows. Each CV goes to the reviewer of its profile
+    with remaining capacity and the fewest assignments (earliest reviewer on ties).
+    Returns a list of (cv_id, roll_no, reviewer_name).
+    """
+    heaps = ReviewerLoadHeaps(reviewers)
+    plan = []
+    for cv in cvs:
+        reviewer = heaps.assign(cv["profiles"])
+        if reviewer is not None:
+            plan.append((cv["id"], cv["roll_no"], reviewer["name"]))
+    return plan
+
+
+def plan_allocation_optimal(cvs, reviewers, fairness_weight=1.0, specialist_weight=0.5):
+    """
+    Solve the whole batch at once as a min-cost flow from profiles to reviewers.
+    CVs of one profile are interchangeable, so the flow runs profile -> reviewer
+    -> unit capacity slots; each slot costs the reviewer load it creates, which
+    spreads work evenly, and multi-domain reviewers cost a little more so they are
+    kept for profiles nobody else covers. A large reward per assignment makes
+    allocating as many CVs as possible come first. The constraint matrix is a
+    network matrix, so the simplex solution is integral.
+    Same inputs and output as plan_allocation.
+    """
+    import numpy as np
+    from scipy.optimize import linprog
+    from scipy.sparse import coo_matrix
+
+    cvs_by_profile = {}
+    for cv in cvs:
+        cvs_by_profile.setdefault(canonical_profile(cv["profiles"]), []).append(cv)
+    profiles = list(cvs_by_profile)
+    reviewers = [r for r in reviewers if r["remaining_capacity"] > 0]
+    reviewer_keys = [set(reviewer_domain_keys(r)) for r in reviewers]
+
+    edges = [(p, j) for p, key in enumerate(profiles) for j, keys in enumerate(reviewer_keys) if key in keys]
+    if not edges:
+        return []
+    edge_p = np.array([p for p, _ in edges])
+    edge_r = np.array([j for _, j in edges])
+    n_edges = len(edges)
+
+    # One 0..1 slot per free place; slot k of a reviewer costs its load after k more CVs
+    capacity = np.array([r["remaining_capacity"] for r in reviewers])
+    load = np.array([r["total_assigned"] for r in reviewers])
+    slot_r = np.repeat(np.arange(len(reviewers)), capacity)
+    slot_k = np.arange(len(slot_r)) - np.repeat(np.cumsum(capacity) - capacity, capacity)
+    n_slots = len(slot_r)
+
+    slot_cost = fairness_weight * (load[slot_r] + slot_k)
+    n_domains = np.array([len(keys) for keys in reviewer_keys])
+    edge_cost = specialist_weight * (n_domains[edge_r] - 1)
+    # An augmenting path crosses each profile at most once, so this outweighs any reshuffle
+    reward = slot_cost.max(initial=0) + len(profiles) * edge_cost.max(initial=0) + 1
+    costs = np.concatenate([edge_cost - reward, slot_cost])
+
+    n_vars = n_edges + n_slots
+    # Each profile ships at most the CVs it has
+    a_ub = coo_matrix((np.ones(n_edges), (edge_p, np.arange(n_edges))), shape=(len(profiles), n_vars))
+    b_ub = np.array([len(cvs_by_profile[key]) for key in profiles])
+    # Everything a reviewer receives fills its slots
+    a_eq = coo_matrix(
+        (np.concatenate([np.ones(n_edges), -np.ones(n_slots)]),
+         (np.concatenate([edge_r, slot_r]), np.arange(n_vars))),
+        shape=(len(reviewers), n_vars),
+    )
+    result = linprog(
+        costs, A_ub=a_ub.tocsr(), b_ub=b_ub, A_eq=a_eq.tocsr(), b_eq=np.zeros(len(reviewers)),
+        bounds=[(0, None)] * n_edges + [(0, 1)] * n_slots, method="highs-ds",
+    )
+    if not result.success:
+        raise RuntimeError(f"Allocation solver failed: {result.message}")
+
+    flows = np.rint(result.x[:n_edges]).astype(int)
+    plan = []
+    for e in np.flatnonzero(flows > 0):
+        queue = cvs_by_profile[profiles[edge_p[e]]]
+        name = reviewers[edge_r[e]]["name"]
+        plan.extend((cv["id"], cv["roll_no"], name) for cv in queue[:flows[e]])
+        del queue[:flows[e]]
+    return plan
+
+
+# Selectable planners; both take (cvs, reviewers) and return [(cv_id, roll_no, reviewer)]
+ALLOCATION_MODES = {
+    "greedy": plan_allocation,
+    "optimal": plan_allocation_optimal,
+}
+
+
+def apply_allocation(cur, plan):
+    """
+    Write a plan with one UPDATE ... FROM (VALUES ...). CVs that were assigned
+    by someone else in the meantime are left alone. Returns the applied rows.
+    """
+    if not plan:
+        return []
+    from psycopg2.extras import execute_values
+
+    return execute_values(cur, """
+        UPDATE user_data u
+           SET assigned_to = v.reviewer
+          FROM (VALUES %s) AS v(id, roll_no, reviewer)
+         WHERE u.id = v.id AND u.assigned_to IS NULL AND u.status_num = 1
+     RETURNING u.id, u.roll_no, u.assigned_to
+    """, plan, template="(%s::int, %s, %s)", page_size=len(plan), fetch=True)
+
+
+def _read_allocation_input(cur, lock_rows=False):
+    """Unassigned CVs by profile and reviewer load/domains, read on one connection"""
+    cur.execute(f"""
+        SELECT id, roll_no, profiles
+        FROM user_data
+        WHERE status_num = 1 AND assigned_to IS NULL
+        ORDER BY profiles COLLATE "C", id ASC
+        {"FOR UPDATE SKIP LOCKED" if lock_rows else ""}
+    """)
+    unassigned_cvs = cur.fetchall()
+    if not unassigned_cvs:
+        return [], []
+    cur.execute(ALLOCATION_CANDIDATES_SQL)
+    return unassigned_cvs, cur.fetchall()
+
+
+def allocate_in_transaction(cur, mode: str = "greedy"):
+    """
+    One allocation pass on the caller's cursor and transaction: lock, read the
+    unassigned CVs and reviewer load, plan, and apply in one bulk write.
+    Returns {"busy", "cvs", "reviewers", "applied"}; busy means another run holds the lock.
+    """
+    # Runs are serialized: a concurrent click returns at once, since the run
+    # holding the lock (or the next one) picks up the same CVs
+    cur.execute("SELECT pg_try_advisory_xact_lock(%s) AS locked", (ALLOCATION_LOCK_KEY,))
+    if not cur.fetchone()["locked"]:
+        return {"busy": True, "cvs": [], "reviewers": [], "applied": []}
+
+    # Rows another transaction is editing are left for the next run
+    unassigned_cvs, reviewers = _read_allocation_input(cur, lock_rows=True)
+    if not unassigned_cvs:
+        return {"busy": False, "cvs": [], "reviewers": [], "applied": []}
+
+    plan = ALLOCATION_MODES[mode](unassigned_cvs, reviewers)
+    return {"busy": False, "cvs": unassigned_cvs, "reviewers": reviewers, "applied": apply_allocation(cur, plan)}
+
+
+@contextmanager
+def _cursor_scope(cur=None):
+    """Yield the caller's cursor as-is (they commit), or a pooled one that commits on exit"""
+    if cur is not None:
+        yield cur
+        return
+    from database_pool import get_db_cursor
+
+    with get_db_cursor() as (_, pooled):
+        yield pooled
+
+
+def smart_cv_allocation(mode: str = "greedy", cur=None):
+    """
+    Intelligent CV allocation system with load balancing; mode is a key of
+    ALLOCATION_MODES. Pass cur to run in the caller's transaction, which must
+    then commit to apply the allocation and release its locks.
+    """
+    start = time.perf_counter()
+    with _cursor_scope(cur) as cur:
+        run = allocate_in_transaction(cur, mode)
+
+    if run["busy"]:
+        return {"allocated": 0, "message": "Allocation is already running, try again in a moment",
+                "details": [], "busy": True}
+    if not run["cvs"]:
+        return {"allocated": 0, "message": "No unassigned CVs", "details": []}
+    applied = run["applied"]
+    return {
+        "allocated": len(applied),
+        "message": f"Allocated {len(applied)} CVs",
+        "details": [f"{row['roll_no']} → {row['assigned_to']}" for row in applied],
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def preview_allocation(mode: str = "greedy", cur=None):
+    """
+    Dry run: plan an allocation without locking or writing anything.
+    Returns {"mode", "created_at", "plan", "unassigned", "reviewers", "profiles"};
+    reviewers and profiles are before/after load diffs, and plan can be passed
+    unchanged to apply_allocation_plan. cur is optional, as for smart_cv_allocation.
+    """
+    with _cursor_scope(cur) as cur:
+        cvs, reviewers = _read_allocation_input(cur)
+    plan = ALLOCATION_MODES[mode](cvs, reviewers) if cvs else []
+
+    added = {}
+    for _, _, name in plan:
+        added[name] = added.get(name, 0) + 1
+    reviewer_diff = sorted((
+        {
+            "reviewer": r["name"],
+            "domains": r["rprofilez"],
+            "quota": r["reviewsnumber"],
+            "before": r["total_assigned"],
+            "added": added.get(r["name"], 0),
+            "after": r["total_assigned"] + added.get(r["name"], 0),
+        }
+        for r in reviewers
+    ), key=lambda row: (-row["added"], row["reviewer"]))
+
+    profile_of = {cv["id"]: cv["profiles"] for cv in cvs}
+    profile_diff = {}
+    for cv in cvs:
+        row = profile_diff.setdefault(cv["profiles"], {"profile": cv["profiles"], "unassigned_before": 0, "allocated": 0})
+        row["unassigned_before"] += 1
+    for cv_id, _, _ in plan:
+        profile_diff[profile_of[cv_id]]["allocated"] += 1
+    for row in profile_diff.values():
+        row["unassigned_after"] = row["unassigned_before"] - row["allocated"]
+
+    return {
+        "mode": mode,
+        "created_at": time.time(),
+        "plan": plan,
+        "unassigned": len(cvs),
+        "reviewers": reviewer_diff,
+        "profiles": sorted(profile_diff.values(), key=lambda row: -row["unassigned_before"]),
+    }
+
+
+def apply_allocation_plan(preview, cur=None):
+    """
+    Write a previewed plan as-is in one bulk UPDATE, without recomputing it.
+    CVs that were assigned or changed status since the preview are skipped, and
+    so is every CV planned for a reviewer whose load changed since the preview
+    (a claim, reclaim, another run or a lowered quota), so nobody is pushed
+    past their quota.
+    cur is optional, as for smart_cv_allocation.
+    Returns {"allocated", "skipped", "stale_reviewers", "busy"}.
+    """
+    plan = preview["plan"]
+    previewed = {row["reviewer"]: (row["before"], row["added"]) for row in preview["reviewers"]}
+    names = sorted({name for _, _, name in plan})
+    with _cursor_scope(cur) as cur:
+        cur.execute("SELECT pg_try_advisory_xact_lock(%s) AS locked", (ALLOCATION_LOCK_KEY,))
+        if not cur.fetchone()["locked"]:
+            return {"allocated": 0, "skipped": 0, "stale_reviewers": [], "busy": True}
+
+        # Same row lock claim_next_cv takes, so no claim lands between this check and the write
+        cur.execute("SELECT id FROM reviewer_data WHERE name = ANY(%s) ORDER BY id FOR UPDATE", (names,))
+        cur.execute(f"""
+            SELECT name, total_assigned, remaining_capacity FROM ({ALLOCATION_STATS_SQL}) s WHERE name = ANY(%s)
+        """, (names,))
+        current = {r["name"]: r for r in cur.fetchall()}
+        stale = [
+            name for name in names
+            if name not in current or current[name]["total_assigned"] != previewed[name][0]
+            or current[name]["remaining_capacity"] < previewed[name][1]
+        ]
+        applied = apply_allocation(cur, [row for row in plan if row[2] not in stale])
+    return {"allocated": len(applied), "skipped": len(plan) - len(applied), "stale_reviewers": stale, "busy": False}
+
+
+def claim_next_cv(reviewer_name: str):
+    """
+    Pull-based allocation: atomically assign the oldest unassigned CV in one of
+    the reviewer's domains, if they have free capacity (quota minus completed
+    minus pending). Each domain's queue head is found through the partial
+    idx_user_data_claim_queue index, and rows another claim holds are skipped.
+    Returns the claimed {"id", "roll_no", "name", "profiles"} or None.
+    """
+    from database_pool import get_db_cursor
+
+    with get_db_cursor() as (_, cur):
+        # Serialize this reviewer's own concurrent claims so capacity cannot overshoot;
+        # the claim below runs in a later snapshot and sees any claim committed meanwhile
+        cur.execute("SELECT id FROM reviewer_data WHERE name = %s FOR UPDATE", (reviewer_name,))
+        reviewer = cur.fetchone()
+        if not reviewer:
+            return None
+
+        cur.execute("""
+            WITH me AS (
+                SELECT r.reviewsnumber
+                       - (SELECT COUNT(*) FROM reviews_data WHERE reviewer_name = r.name)
+                       - (SELECT COUNT(*) FROM user_data WHERE assigned_to = r.name AND status_num = 1) AS free
+                  FROM reviewer_data r
+                 WHERE r.id = %(id)s
+            ), next_cv AS (
+                SELECT c.id
+                  FROM me, reviewer_domains d,
+                       LATERAL (
+                            SELECT u.id, u.submission_time
+                              FROM user_data u
+                             WHERE canonical_profile(u.profiles) = d.profile_key
+                               AND u.status_num = 1 AND u.assigned_to IS NULL
+                             ORDER BY u.submission_time, u.id
+                             LIMIT 1
+                               FOR UPDATE SKIP LOCKED
+                       ) c
+                 WHERE me.free > 0 AND d.reviewer_id = %(id)s
+                 ORDER BY c.submission_time, c.id
+                 LIMIT 1
+            )
+            UPDATE user_data u
+               SET assigned_to = %(name)s
+              FROM next_cv
+             WHERE u.id = next_cv.id AND u.assigned_to IS NULL
+         RETURNING u.id, u.roll_no, u.name, u.profiles
+        """, {"id": reviewer["id"], "name": reviewer_name})
+        return cur.fetchone()
+
+
+# Return CVs whose lease ran out to the pool, log each one for analytics and mark
+# their reviewers as lapsed so the allocator passes them over
+RECLAIM_EXPIRED_SQL = """
+    WITH expired AS (
+        SELECT id, assigned_to, assigned_at
+          FROM user_data
+         WHERE status_num = 1 AND assigned_to IS NOT NULL AND lease_expires_at < now()
+           FOR UPDATE SKIP LOCKED
+    ), released AS (
+        UPDATE user_data u
+           SET assigned_to = NULL
+          FROM expired e
+         WHERE u.id = e.id
+     RETURNING u.id, u.roll_no, u.profiles, e.assigned_to AS reviewer, e.assigned_at
+    ), lapsed AS (
+        UPDATE reviewer_data r
+           SET leases_lapsed_at = now()
+         WHERE r.name IN (SELECT reviewer FROM released) AND r.leases_lapsed_at IS NULL
+    )
+    INSERT INTO assignment_reclaims (user_id, roll_no, profile, reviewer, assigned_at)
+    SELECT id, roll_no, profiles, reviewer, assigned_at FROM released
+    RETURNING user_id, roll_no, reviewer
+"""
+
+
+def reclaim_expired_assignments(reallocate: bool = True):
+    """
+    Unassign every pending CV whose lease expired, then allocate the pool again.
+    Reviewers who let their leases lapse are skipped by this and every later run
+    until renew_assignment_leases clears the mark on their next login.
+    Returns {"reclaimed", "reviewers", "allocated"}.
+    """
+    from database_pool import get_db_cursor
+
+    with get_db_cursor() as (_, cur):
+        cur.execute(RECLAIM_EXPIRED_SQL)
+        reclaimed = cur.fetchall()
+
+    result = {
+        "reclaimed": len(reclaimed),
+        "reviewers": sorted({r["reviewer"] for r in reclaimed}),
+        "allocated": 0,
+    }
+    if reclaimed and reallocate:
+        result["allocated"] = smart_cv_allocation()["allocated"]
+    return result
+
+
+def renew_assignment_leases(cur, reviewer_name: str):
+    """
+    Extend the leases of an active reviewer's pending CVs and make them eligible
+    for allocation again if their leases had lapsed. Only leases past half their
+    term are touched, so frequent logins do not rewrite every row.
+    """
+    from database_pool import ASSIGNMENT_LEASE_HOURS
+
+    cur.execute("""
+        UPDATE reviewer_data SET leases_lapsed_at = NULL
+         WHERE name = %s AND leases_lapsed_at IS NOT NULL
+    """, (reviewer_name,))
+
+    cur.execute("""
+        UPDATE user_data
+           SET lease_expires_at = now() + make_interval(hours => %(hours)s)
+         WHERE assigned_to = %(name)s AND status_num = 1
+           AND lease_expires_at < now() + make_interval(hours => %(hours)s) / 2
+    """, {"name": reviewer_name, "hours": ASSIGNMENT_LEASE_HOURS})
+    return cur.rowcount
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Allocate unassigned CVs to reviewers")
+    parser.add_argument("--mode", choices=list(ALLOCATION_MODES), default="greedy", help="Allocation planner")
+    parser.add_argument("--reclaim", action="store_true", help="Reclaim expired assignments and reallocate them")
+    args = parser.parse_args(argv)
+
+    if args.reclaim:
+        r = reclaim_expired_assignments()
+        print(f"✅ Reclaimed {r['reclaimed']} expired assignment(s), reallocated {r['allocated']}")
+        return 0
+
+    result = smart_cv_allocation(args.mode)
+    print(f"✅ {result['message']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
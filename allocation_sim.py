@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Allocation simulator: synthetic students and reviewers with skewed domain
+demand, run through every allocation mode in memory and, optionally, against a
+local Postgres. Reports runtime, queries issued, load imbalance and leftovers.
+
+    python allocation_sim.py --scale 10
+    python allocation_sim.py --mode greedy --students 10000 --reviewers 500
+    python allocation_sim.py --scale 10 --postgres --dsn postgresql://localhost/cv_sim --json sim.json
+
+The Postgres run seeds and allocates inside a single transaction on a clean
+slate (existing rows are deleted first) and always rolls back. The deletes hold
+row locks until the end, so --dsn must name a local or scratch database with
+the app schema; the app's own DATABASE_URL is refused.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from allocation import (ALLOCATION_MODES, ALLOCATION_STATS_SQL, allocate_in_transaction,
+                        canonical_profile, cv_allocation_order, reviewer_allocation_order)
+
+SIM_PROFILES = ["Data", "Software", "Consult", "Finance/Quant", "Product", "FMCG", "Core"]
+# Roughly one season's volume; --scale multiplies both
+BASE_STUDENTS = 1000
+BASE_REVIEWERS = 60
+
+
+def _zipf_weights(n, skew):
+    return [1 / (rank ** skew) for rank in range(1, n + 1)]
+
+
+def generate_season(scale=1.0, seed=0, demand_skew=1.1, supply_skew=0.6, n_students=None, n_reviewers=None):
+    """
+    Synthetic students and reviewers. Student profiles follow a Zipf-like demand
+    curve; reviewer domains (one to three each, written in either Finance
+    spelling) follow a flatter one, so popular profiles run short of reviewers
+    the way a real season does. n_students / n_reviewers override the counts
+    derived from scale. Returns (students, reviewers).
+    """
+    rng = random.Random(seed)
+    demand = _zipf_weights(len(SIM_PROFILES), demand_skew)
+    supply = _zipf_weights(len(SIM_PROFILES), supply_skew)
+
+    students = [
+        {"id": i + 1, "roll_no": f"SIM{i:06d}", "name": f"Student {i}",
+         "profiles": rng.choices(SIM_PROFILES, weights=demand)[0]}
+        for i in range(n_students if n_students is not None else int(BASE_STUDENTS * scale))
+    ]
+
+    reviewers = []
+    for i in range(n_reviewers if n_reviewers is not None else int(BASE_REVIEWERS * scale)):
+        domains = set()
+        while len(domains) < rng.choice([1, 1, 2, 3]):
+            domains.add(rng.choices(SIM_PROFILES, weights=supply)[0])
+        quota = rng.randint(10, 40)
+        completed = rng.randint(0, quota // 2)
+        reviewers.append({
+            "name": f"sim_reviewer_{i:05d}",
+            "rprofilez": ", ".join(d.replace("/", "-") if rng.random() < 0.5 else d for d in sorted(domains)),
+            "reviewsnumber": quota,
+            "completed_reviews": completed,
+            "total_assigned": completed,
+            "remaining_capacity": quota - completed,
+        })
+    return students, reviewers
+
+
+def load_metrics(students, reviewers, applied):
+    """Leftovers and how evenly the new work landed on reviewers, relative to quota"""
+    new_load = {}
+    for _, _, name in applied:
+        new_load[name] = new_load.get(name, 0) + 1
+    utilization = [
+        (r["total_assigned"] + new_load.get(r["name"], 0)) / r["reviewsnumber"]
+        for r in reviewers if r["reviewsnumber"] > 0
+    ]
+    covered = {key for r in reviewers for key in
+               {canonical_profile(d) for d in (r["rprofilez"] or "").split(",")} - {""}}
+    mean = statistics.fmean(utilization) if utilization else 0.0
+    return {
+        "students": len(students),
+        "reviewers": len(reviewers),
+        "allocated": len(applied),
+        "unassigned": len(students) - len(applied),
+        "unassigned_uncovered": sum(1 for s in students if canonical_profile(s["profiles"]) not in covered),
+        "utilization_mean": mean,
+        "utilization_cv": statistics.pstdev(utilization) / mean if mean else 0.0,
+        "max_new_load": max(new_load.values(), default=0),
+    }
+
+
+def run_in_memory(students, reviewers, mode):
+    """Plan in the order the app reads its input, so results match the Postgres run"""
+    students = sorted(students, key=cv_allocation_order)
+    reviewers = sorted(reviewers, key=reviewer_allocation_order)
+    start = time.perf_counter()
+    plan = ALLOCATION_MODES[mode](students, reviewers)
+    seconds = time.perf_counter() - start
+    return {"mode": mode, "backend": "memory", "seconds": seconds, "queries": 0,
+            **load_metrics(students, reviewers, plan)}
+
+
+def run_in_postgres(dsn, students, reviewers, mode):
+    """Seed, read stats and allocate in one transaction, then roll everything back"""
+    import psycopg2
+    from psycopg2.extras import execute_values
+    from db_cursors import TimedCursor
+
+    conn = psycopg2.connect(dsn)
+    try:
+        cur = conn.cursor(cursor_factory=TimedCursor)
+        for table in ("reviews_data", "user_data", "reviewer_data"):
+            cur.execute(f"DELETE FROM {table}")
+        execute_values(cur, """
+            INSERT INTO reviewer_data (name, password, reviewsnumber, rprofilez) VALUES %s
+        """, [(r["name"], "sim", r["reviewsnumber"], r["rprofilez"]) for r in reviewers], page_size=1000)
+        execute_values(cur, """
+            INSERT INTO reviews_data (name, roll_no, reviewer_name) VALUES %s
+        """, [("Done", f"DONE{i:06d}", r["name"])
+              for i, r in enumerate(reviewers) for _ in range(r["completed_reviews"])], page_size=1000)
+        execute_values(cur, """
+            INSERT INTO user_data (name, roll_no, status_num, profiles) VALUES %s
+        """, [(s["name"], s["roll_no"], 1, s["profiles"]) for s in students], page_size=1000)
+
+        cur.statements, cur.db_seconds = 0, 0.0
+        start = time.perf_counter()
+        cur.execute(ALLOCATION_STATS_SQL)
+        cur.fetchall()
+        stats_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        run = allocate_in_transaction(cur, mode)
+        seconds = time.perf_counter() - start
+        applied = [(row["id"], row["roll_no"], row["assigned_to"]) for row in run["applied"]]
+        return {"mode": mode, "backend": "postgres", "seconds": seconds, "queries": cur.statements - 1,
+                "db_seconds": cur.db_seconds, "stats_seconds": stats_seconds,
+                **load_metrics(students, reviewers, applied)}
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+def run_suite(scale=1.0, seed=0, modes=tuple(ALLOCATION_MODES), dsn=None, n_students=None, n_reviewers=None):
+    students, reviewers = generate_season(scale, seed, n_students=n_students, n_reviewers=n_reviewers)
+    results = []
+    for mode in modes:
+        results.append(run_in_memory(students, reviewers, mode))
+        if dsn:
+            results.append(run_in_postgres(dsn, students, reviewers, mode))
+            # Greedy is deterministic given the input order, so both backends must agree
+            if mode == "greedy":
+                in_memory, in_postgres = results[-2]["allocated"], results[-1]["allocated"]
+                assert in_memory == in_postgres, (
+                    f"greedy allocated {in_memory} in memory but {in_postgres} in Postgres")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate and benchmark CV allocation on synthetic data")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiple of a normal season's size")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed, for repeatable runs")
+    parser.add_argument("--students", type=int, help="Number of students (overrides --scale)")
+    parser.add_argument("--reviewers", type=int, help="Number of reviewers (overrides --scale)")
+    parser.add_argument("--mode", action="append", choices=list(ALLOCATION_MODES),
+                        help="Mode(s) to run (default: all)")
+    parser.add_argument("--postgres", action="store_true", help="Also run against Postgres (rolled back)")
+    parser.add_argument("--dsn", help="Scratch Postgres DSN for --postgres (required; never the app's DATABASE_URL)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    dsn = None
+    if args.postgres:
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        if not args.dsn:
+            parser.error("--postgres needs --dsn pointing at a scratch database")
+        if args.dsn == os.getenv("DATABASE_URL"):
+            parser.error("--dsn is the app's DATABASE_URL; the simulation deletes every row, use a scratch database")
+        dsn = args.dsn
+
+    results = run_suite(args.scale, args.seed, tuple(args.mode or ALLOCATION_MODES), dsn,
+                        n_students=args.students, n_reviewers=args.reviewers)
+
+    print(f"{'mode':<8} {'backend':<9} {'ms':>9} {'queries':>8} {'allocated':>10} {'left':>6} "
+          f"{'uncovered':>10} {'util':>6} {'util cv':>8} {'max new':>8}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['backend']:<9} {r['seconds'] * 1000:>9.1f} {r['queries']:>8} "
+              f"{r['allocated']:>10} {r['unassigned']:>6} {r['unassigned_uncovered']:>10} "
+              f"{r['utilization_mean']:>6.2f} {r['utilization_cv']:>8.3f} {r['max_new_load']:>8}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"scale": args.scale, "seed": args.seed, "students": args.students,
+                       "reviewers": args.reviewers, "results": results}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Admin analytics backed by materialized views (created in init_db).
+The views are refreshed CONCURRENTLY on a schedule by a background thread in
+each app process; an advisory lock makes sure only one node refreshes at a time.
+
+Refresh once from cron or a shell with:
+    python analytics.py
+"""
+
+import os
+import sys
+import threading
+import time
+
+from database_pool import get_db_cursor
+
+ANALYTICS_VIEWS = ("mv_profile_stats", "mv_reviewer_throughput", "mv_turnaround", "mv_assignment_health")
+REFRESH_INTERVAL_SECONDS = int(os.getenv("ANALYTICS_REFRESH_SECONDS", "300"))
+# Arbitrary app-wide key for pg_try_advisory_xact_lock
+ANALYTICS_LOCK_KEY = 7_310_039
+
+_refresher = None
+
+
+def refresh_analytics():
+    """Refresh every analytics view without blocking readers; returns seconds taken or None if skipped"""
+    start = time.perf_counter()
+    with get_db_cursor() as (_, cur):
+        cur.execute("SELECT pg_try_advisory_xact_lock(%s) AS locked", (ANALYTICS_LOCK_KEY,))
+        if not cur.fetchone()["locked"]:
+            return None
+        for view in ANALYTICS_VIEWS:
+            cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};")
+    return time.perf_counter() - start
+
+
+def _refresh_loop(interval):
+    while True:
+        try:
+            refresh_analytics()
+        except Exception as e:
+            print(f"Analytics refresh failed: {e}")
+        time.sleep(interval)
+
+
+def start_scheduled_refresh(interval: int = REFRESH_INTERVAL_SECONDS):
+    """Start the background refresher once per process"""
+    global _refresher
+    if _refresher is None or not _refresher.is_alive():
+        _refresher = threading.Thread(target=_refresh_loop, args=(interval,), daemon=True,
+                                      name="analytics-refresh")
+        _refresher.start()
+    return _refresher
+
+
+def load_analytics():
+    """Read the pre-aggregated analytics; cost depends on the number of profiles/reviewers only"""
+    with get_db_cursor() as (_, cur):
+        cur.execute("SELECT * FROM mv_profile_stats ORDER BY submitted DESC")
+        profiles = cur.fetchall()
+        cur.execute("SELECT * FROM mv_reviewer_throughput ORDER BY completed DESC, reviewer")
+        reviewers = cur.fetchall()
+        cur.execute("SELECT * FROM mv_turnaround ORDER BY (profile = 'All') DESC, profile")
+        turnaround = cur.fetchall()
+        cur.execute("SELECT * FROM mv_assignment_health ORDER BY (profile = 'All') DESC, profile")
+        assignments = cur.fetchall()
+    refreshed = [rows[0]["refreshed_at"] for rows in (profiles, reviewers, turnaround, assignments) if rows]
+    return {
+        "profiles": profiles,
+        "reviewers": reviewers,
+        "turnaround": turnaround,
+        "assignments": assignments,
+        "refreshed_at": min(refreshed) if refreshed else None,
+    }
+
+
+if __name__ == "__main__":
+    seconds = refresh_analytics()
+    if seconds is None:
+        print("ℹ️ Another process is refreshing analytics; skipped.")
+    else:
+        print(f"✅ Refreshed {len(ANALYTICS_VIEWS)} analytics views in {seconds:.2f}s")
+    sys.exit(0)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Event-driven CV allocation.
+Inserts into user_data fire NOTIFY cv_submitted (trigger created in init_db). A
+listener thread in each app process waits a short coalescing window after the
+first notification, so a burst of submissions becomes one small allocation run.
+A periodic sweep reclaims CVs whose assignment lease expired and catches
+anything submitted while no listener was connected.
+
+Run a standalone listener instead of the in-app thread with:
+    python auto_allocation.py
+"""
+
+import os
+import select
+import sys
+import threading
+import time
+
+import psycopg2
+
+from allocation import smart_cv_allocation, reclaim_expired_assignments
+
+CHANNEL = "cv_submitted"
+AUTO_ALLOCATION_ENABLED = os.getenv("AUTO_ALLOCATION", "1") != "0"
+AUTO_ALLOCATION_MODE = os.getenv("AUTO_ALLOCATION_MODE", "greedy")
+COALESCE_SECONDS = float(os.getenv("AUTO_ALLOCATION_COALESCE_SECONDS", "2"))
+SWEEP_SECONDS = float(os.getenv("AUTO_ALLOCATION_SWEEP_SECONDS", "300"))
+RECONNECT_SECONDS = 5
+
+_listener = None
+
+
+def _wait_for_notifications(conn, timeout):
+    """Block for up to timeout seconds; returns how many notifications arrived"""
+    if select.select([conn], [], [], timeout) == ([], [], []):
+        return 0
+    conn.poll()
+    received = len(conn.notifies)
+    conn.notifies.clear()
+    return received
+
+
+def _coalesce(conn):
+    """Absorb the rest of a burst of notifications for COALESCE_SECONDS"""
+    deadline = time.monotonic() + COALESCE_SECONDS
+    remaining = COALESCE_SECONDS
+    while remaining > 0:
+        _wait_for_notifications(conn, remaining)
+        remaining = deadline - time.monotonic()
+
+
+def allocate_pending():
+    """Allocate unassigned CVs, retrying while another process holds the allocation lock"""
+    while True:
+        result = smart_cv_allocation(AUTO_ALLOCATION_MODE)
+        if not result.get("busy"):
+            if result["allocated"]:
+                print(f"Auto-allocation: {result['message']} in {result['seconds'] * 1000:.0f} ms")
+            return result
+        # The run holding the lock may have read the unassigned set before our CVs committed
+        time.sleep(COALESCE_SECONDS)
+
+
+def listen_forever():
+    from database_pool import DATABASE_URL
+
+    while True:
+        conn = None
+        try:
+            # LISTEN needs its own long-lived autocommit connection, outside the pool
+            conn = psycopg2.connect(DATABASE_URL)
+            conn.autocommit = True
+            conn.cursor().execute(f"LISTEN {CHANNEL};")
+            allocate_pending()
+            next_sweep = time.monotonic() + SWEEP_SECONDS
+            while True:
+                if _wait_for_notifications(conn, max(0, next_sweep - time.monotonic())):
+                    _coalesce(conn)
+                if time.monotonic() >= next_sweep:
+                    reclaimed = reclaim_expired_assignments()
+                    if reclaimed["reclaimed"]:
+                        print(f"Auto-allocation: reclaimed {reclaimed['reclaimed']} expired assignment(s), "
+                              f"reallocated {reclaimed['allocated']}")
+                    next_sweep = time.monotonic() + SWEEP_SECONDS
+                allocate_pending()
+        except Exception as e:
+            print(f"Auto-allocation listener error: {e}")
+            time.sleep(RECONNECT_SECONDS)
+        finally:
+            if conn:
+                try:
+                    conn.close()
+                except:
+                    pass
+
+
+def start_auto_allocation():
+    """Start the listener thread once per process (no-op when AUTO_ALLOCATION=0)"""
+    global _listener
+    if not AUTO_ALLOCATION_ENABLED:
+        return None
+    if _listener is None or not _listener.is_alive():
+        _listener = threading.Thread(target=listen_forever, daemon=True, name="auto-allocation")
+        _listener.start()
+    return _listener
+
+
+if __name__ == "__main__":
+    print(f"Listening on '{CHANNEL}' (coalescing {COALESCE_SECONDS:g}s, sweep every {SWEEP_SECONDS:g}s)")
+    try:
+        listen_forever()
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
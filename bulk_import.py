@@ -0,0 +1,165 @@
+import io
+import time
+
+import pandas as pd
+
+from allocation import canonical_profile
+
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+ROLL_NO_PATTERN = r"^\d{2}[A-Z]{2}[A-Z0-9]{5}$"
+
+# Target table -> staging column definitions (in COPY order), required columns and
+# defaults applied to inserted rows when the file leaves a column out or blank
+IMPORT_TARGETS = {
+    "reviewer_data": {
+        "columns": {
+            "name": "VARCHAR(500)",
+            "password": "VARCHAR(30)",
+            "reviewsnumber": "INT",
+            "linkedin": "VARCHAR(500)",
+            "email": "VARCHAR(500)",
+            "rprofilez": "VARCHAR(500)",
+        },
+        "required": ["name", "password", "reviewsnumber"],
+        "key": "name",
+    },
+    "user_data": {
+        "columns": {
+            "name": "VARCHAR(500)",
+            "roll_no": "VARCHAR(10)",
+            "email_id": "VARCHAR(500)",
+            "drive_link": "VARCHAR(500)",
+            "status_num": "INT",
+            "profiles": "VARCHAR(500)",
+        },
+        "required": ["name", "roll_no"],
+        "key": "roll_no",
+        "defaults": {"status_num": 1},
+    },
+}
+
+
+def read_import_file(uploaded_file, filename: str):
+    """Read an uploaded CSV or Parquet file into a DataFrame of strings"""
+    if filename.lower().endswith(".parquet"):
+        df = pd.read_parquet(uploaded_file)
+    else:
+        df = pd.read_csv(uploaded_file, dtype=str, keep_default_na=False)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    return df
+
+
+def validate_import(df, target: str, profiles=None):
+    """
+    Vectorized validation of an import frame.
+    Returns (valid_df, invalid_df); invalid_df carries an 'error' column. valid_df
+    only has the columns the file supplied, so an update never touches the rest.
+    """
+    spec = IMPORT_TARGETS[target]
+    missing = [c for c in spec["required"] if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+    supplied = [c for c in spec["columns"] if c in df.columns]
+
+    df = df.reindex(columns=list(spec["columns"])).copy()
+    for col in df.columns:
+        df[col] = df[col].astype("string").str.strip().replace("", pd.NA)
+
+    errors = pd.Series("", index=df.index, dtype="string")
+
+    def flag(mask, message):
+        nonlocal errors
+        mask = mask.fillna(False).astype(bool)
+        errors = errors.mask(mask, errors + message + "; ")
+
+    for col in spec["required"]:
+        flag(df[col].isna(), f"{col} is required")
+
+    if target == "reviewer_data":
+        quota = pd.to_numeric(df["reviewsnumber"], errors="coerce")
+        flag(df["reviewsnumber"].notna() & (quota.isna() | (quota < 0) | (quota % 1 != 0)),
+             "reviewsnumber must be a non-negative integer")
+        df["reviewsnumber"] = quota.where(quota % 1 == 0).astype("Int64")
+        flag(df["email"].notna() & ~df["email"].str.match(EMAIL_PATTERN), "invalid email")
+        flag(df["password"].str.len() > 30, "password longer than 30 characters")
+        if profiles:
+            known = {canonical_profile(p) for p in profiles}
+            unknown = df["rprofilez"].dropna().str.split(",").apply(
+                lambda domains: any(canonical_profile(d) not in known for d in domains if d.strip())
+            )
+            flag(unknown.reindex(df.index), "unknown domain in rprofilez")
+    else:
+        df["roll_no"] = df["roll_no"].str.upper()
+        flag(df["roll_no"].notna() & ~df["roll_no"].str.match(ROLL_NO_PATTERN), "invalid roll number")
+        flag(df["email_id"].notna() & ~df["email_id"].str.match(EMAIL_PATTERN), "invalid email")
+        status = pd.to_numeric(df["status_num"], errors="coerce")
+        flag(df["status_num"].notna() & ~status.isin([0, 1, 2]), "status_num must be 0, 1 or 2")
+        df["status_num"] = status.where(status.isin([0, 1, 2])).astype("Int64")
+        if profiles:
+            flag(df["profiles"].notna() & ~df["profiles"].isin(profiles), "unknown profile")
+
+    key = spec["key"]
+    flag(df[key].notna() & df[key].duplicated(keep="first"), f"duplicate {key} in file")
+
+    invalid = errors != ""
+    invalid_df = df[invalid].assign(error=errors[invalid].str.rstrip("; "))
+    return df.loc[~invalid, supplied].reset_index(drop=True), invalid_df.reset_index(drop=True)
+
+
+def import_rows(cur, df, target: str, update_existing: bool = False):
+    """
+    COPY validated rows into a temp staging table and merge them into target in
+    the caller's transaction. Existing keys are updated (only the columns present
+    in df; blank defaulted cells keep the current value) or reported as conflicts.
+    Returns {"inserted", "updated", "conflicts" (DataFrame), "seconds"}.
+    """
+    start = time.perf_counter()
+    spec = IMPORT_TARGETS[target]
+    cols = [c for c in spec["columns"] if c in df.columns]
+    defaults = spec.get("defaults", {})
+    key = spec["key"]
+    staging = f"import_{target}"
+
+    cur.execute(f"""
+        CREATE TEMP TABLE {staging} ({', '.join(f'{c} {t}' for c, t in spec['columns'].items())})
+        ON COMMIT DROP
+    """)
+    buf = io.StringIO()
+    df[cols].to_csv(buf, index=False, header=False, na_rep="\\N")
+    buf.seek(0)
+    cur.copy_expert(f"COPY {staging} ({', '.join(cols)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buf)
+
+    # user_data has no unique constraint on roll_no, so match on key explicitly
+    cur.execute(f"""
+        SELECT s.{key} FROM {staging} s
+         WHERE EXISTS (SELECT 1 FROM {target} t WHERE t.{key} = s.{key})
+    """)
+    existing = [r[key] for r in cur.fetchall()]
+
+    updated = 0
+    if existing and update_existing:
+        set_cols = [c for c in cols if c != key]
+        if set_cols:
+            cur.execute(f"""
+                UPDATE {target} t
+                   SET {', '.join(f'{c} = COALESCE(s.{c}, t.{c})' if c in defaults else f'{c} = s.{c}'
+                                  for c in set_cols)}
+                  FROM {staging} s
+                 WHERE t.{key} = s.{key}
+            """)
+            updated = cur.rowcount
+
+    insert_cols = cols + [c for c in defaults if c not in cols]
+    cur.execute(f"""
+        INSERT INTO {target} ({', '.join(insert_cols)})
+        SELECT {', '.join(f'COALESCE(s.{c}, %s)' if c in defaults else f's.{c}' for c in insert_cols)}
+          FROM {staging} s
+         WHERE NOT EXISTS (SELECT 1 FROM {target} t WHERE t.{key} = s.{key})
+    """, [defaults[c] for c in insert_cols if c in defaults])
+    inserted = cur.rowcount
+
+    conflicts = pd.DataFrame(
+        {key: existing, "action": "updated" if update_existing else "skipped (already exists)"}
+    ) if existing else pd.DataFrame(columns=[key, "action"])
+    return {"inserted": inserted, "updated": updated, "conflicts": conflicts,
+            "seconds": time.perf_counter() - start}
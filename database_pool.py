@@ -9,6 +9,8 @@ import time
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
+# How long a reviewer holds an assigned CV before the reclaimer returns it to the pool
+ASSIGNMENT_LEASE_HOURS = int(os.getenv("ASSIGNMENT_LEASE_HOURS", "72"))
 
 # Create a SimpleConnectionPool once at startup
 db_pool: pool.SimpleConnectionPool = pool.SimpleConnectionPool(
@@ -18,10 +20,11 @@ db_pool: pool.SimpleConnectionPool = pool.SimpleConnectionPool(
 )
 
 @contextmanager
-def get_db_cursor():
+def get_db_cursor(cursor_factory=RealDictCursor):
     """
     Context manager that yields (conn, cursor) from the Postgres pool
     using a RealDictCursor so cursor.fetchone() returns dicts.
+    Pass cursor_factory=TimedCursor to measure the database time of a page.
     Includes connection validation and retry logic.
     """
     conn = None
@@ -38,7 +41,7 @@ def get_db_cursor():
             test_cursor.execute("SELECT 1")
             test_cursor.close()
             
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+            cursor = conn.cursor(cursor_factory=cursor_factory)
             yield conn, cursor
             conn.commit()
             break
@@ -133,6 +136,342 @@ def init_db():
         );
         """)
 
+        # Create resume_text table for extracted resume content (keyed by PDF content hash)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS resume_text (
+            content_hash CHAR(64) PRIMARY KEY,
+            roll_no VARCHAR(10),
+            page_count INT NOT NULL DEFAULT 0,
+            text TEXT,
+            sections JSONB,
+            extracted_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+        );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_resume_text_roll_no ON resume_text (roll_no);")
+
+        # Create resume_skills table (normalized skills per student)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS resume_skills (
+            roll_no VARCHAR(10) NOT NULL,
+            skill VARCHAR(200) NOT NULL,
+            PRIMARY KEY (roll_no, skill)
+        );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_resume_skills_skill ON resume_skills (skill);")
+
+        # Full-text search vectors (generated, so they never drift from the source columns)
+        cur.execute("""
+        ALTER TABLE resume_text ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (to_tsvector('english', COALESCE(text, ''))) STORED;
+        """)
+        cur.execute("""
+        ALTER TABLE reviews_data ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (to_tsvector('english',
+                COALESCE(structure_format, '') || ' ' || COALESCE(domain_relevance, '') || ' ' ||
+                COALESCE(depth_explanation, '') || ' ' || COALESCE(language_grammar, '') || ' ' ||
+                COALESCE(project_improvements, '') || ' ' || COALESCE(additional_suggestions, ''))) STORED;
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_resume_text_search ON resume_text USING GIN (search_vector);")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_reviews_data_search ON reviews_data USING GIN (search_vector);")
+
+        # Change tracking: every UPDATE bumps row_version (optimistic concurrency) and
+        # updated_at (incremental refresh); deletes leave a tombstone behind
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS row_tombstones (
+            table_name VARCHAR(64) NOT NULL,
+            row_id INT NOT NULL,
+            deleted_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+        );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_row_tombstones_table_time ON row_tombstones (table_name, deleted_at);")
+        cur.execute("DELETE FROM row_tombstones WHERE deleted_at < now() - INTERVAL '7 days';")
+        cur.execute("""
+        CREATE OR REPLACE FUNCTION touch_row() RETURNS trigger AS $$
+        BEGIN
+            NEW.row_version := OLD.row_version + 1;
+            NEW.updated_at := clock_timestamp();
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """)
+        cur.execute("""
+        CREATE OR REPLACE FUNCTION record_tombstone() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO row_tombstones (table_name, row_id) VALUES (TG_TABLE_NAME, OLD.id);
+            RETURN OLD;
+        END;
+        $$ LANGUAGE plpgsql;
+        """)
+        for table in ("user_data", "reviewer_data", "reviews_data"):
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS row_version INT NOT NULL DEFAULT 1;")
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp();")
+            cur.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_updated_at ON {table} (updated_at);")
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_{table}_row_version ON {table};")
+            cur.execute(f"""
+            CREATE TRIGGER trg_{table}_row_version BEFORE UPDATE ON {table}
+                FOR EACH ROW EXECUTE FUNCTION touch_row();
+            """)
+            cur.execute(f"DROP TRIGGER IF EXISTS trg_{table}_tombstone ON {table};")
+            cur.execute(f"""
+            CREATE TRIGGER trg_{table}_tombstone AFTER DELETE ON {table}
+                FOR EACH ROW EXECUTE FUNCTION record_tombstone();
+            """)
+
+        # Reviewer domains as canonical profile keys ("Finance-Quant" == "Finance/Quant"),
+        # kept in sync with reviewer_data.rprofilez by a trigger and backfilled here
+        cur.execute("""
+        CREATE OR REPLACE FUNCTION canonical_profile(value TEXT) RETURNS TEXT AS $$
+            SELECT NULLIF(lower(btrim(replace(value, '-', '/'))), '');
+        $$ LANGUAGE sql IMMUTABLE;
+        """)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS reviewer_domains (
+            reviewer_id INT NOT NULL REFERENCES reviewer_data(id) ON DELETE CASCADE,
+            profile_key VARCHAR(100) NOT NULL,
+            PRIMARY KEY (reviewer_id, profile_key)
+        );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_reviewer_domains_profile ON reviewer_domains (profile_key, reviewer_id);")
+        cur.execute("""
+        CREATE OR REPLACE FUNCTION sync_reviewer_domains() RETURNS trigger AS $$
+        BEGIN
+            DELETE FROM reviewer_domains WHERE reviewer_id = NEW.id;
+            INSERT INTO reviewer_domains (reviewer_id, profile_key)
+            SELECT DISTINCT NEW.id, canonical_profile(d)
+              FROM unnest(string_to_array(NEW.rprofilez, ',')) AS d
+             WHERE canonical_profile(d) IS NOT NULL;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """)
+        cur.execute("DROP TRIGGER IF EXISTS trg_reviewer_data_domains ON reviewer_data;")
+        cur.execute("""
+        CREATE TRIGGER trg_reviewer_data_domains AFTER INSERT OR UPDATE OF rprofilez ON reviewer_data
+            FOR EACH ROW EXECUTE FUNCTION sync_reviewer_domains();
+        """)
+        cur.execute("""
+        INSERT INTO reviewer_domains (reviewer_id, profile_key)
+        SELECT DISTINCT r.id, canonical_profile(d)
+          FROM reviewer_data r, unnest(string_to_array(r.rprofilez, ',')) AS d
+         WHERE canonical_profile(d) IS NOT NULL
+        ON CONFLICT DO NOTHING;
+        """)
+        # Allocation used to match a CV's profile anywhere in rprofilez. Free-text values
+        # entered before the editor became a selectbox (e.g. "Data Science / ML") keep
+        # matching the CV profiles they contain; the trigger keeps exact keys from then on
+        cur.execute("""
+        INSERT INTO reviewer_domains (reviewer_id, profile_key)
+        SELECT DISTINCT r.id, p.profile_key
+          FROM reviewer_data r
+          JOIN (SELECT DISTINCT canonical_profile(profiles) AS profile_key
+                  FROM user_data
+                 WHERE canonical_profile(profiles) IS NOT NULL) p
+            ON strpos(canonical_profile(r.rprofilez), p.profile_key) > 0
+        ON CONFLICT DO NOTHING;
+        """)
+
+        # New submissions wake the auto-allocation listeners (auto_allocation.py). One
+        # statement-level NOTIFY per insert; Postgres folds duplicates within a transaction
+        cur.execute("""
+        CREATE OR REPLACE FUNCTION notify_cv_submitted() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('cv_submitted', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql;
+        """)
+        cur.execute("DROP TRIGGER IF EXISTS trg_user_data_notify ON user_data;")
+        cur.execute("""
+        CREATE TRIGGER trg_user_data_notify AFTER INSERT ON user_data
+            FOR EACH STATEMENT EXECUTE FUNCTION notify_cv_submitted();
+        """)
+
+        # Assignment leases: every change of assigned_to stamps assigned_at and a lease
+        # expiry; allocation.reclaim_expired_assignments() returns expired CVs to the pool
+        cur.execute("ALTER TABLE user_data ADD COLUMN IF NOT EXISTS assigned_at TIMESTAMPTZ;")
+        cur.execute("ALTER TABLE user_data ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMPTZ;")
+        cur.execute(f"""
+        CREATE OR REPLACE FUNCTION stamp_assignment_lease() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' OR NEW.assigned_to IS DISTINCT FROM OLD.assigned_to THEN
+                IF NEW.assigned_to IS NULL THEN
+                    NEW.assigned_at := NULL;
+                    NEW.lease_expires_at := NULL;
+                ELSE
+                    NEW.assigned_at := clock_timestamp();
+                    NEW.lease_expires_at := clock_timestamp() + INTERVAL '{ASSIGNMENT_LEASE_HOURS} hours';
+                END IF;
+            END IF;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql;
+        """)
+        cur.execute("DROP TRIGGER IF EXISTS trg_user_data_lease ON user_data;")
+        cur.execute("""
+        CREATE TRIGGER trg_user_data_lease BEFORE INSERT OR UPDATE OF assigned_to ON user_data
+            FOR EACH ROW EXECUTE FUNCTION stamp_assignment_lease();
+        """)
+        cur.execute(f"""
+        UPDATE user_data
+           SET assigned_at = COALESCE(assigned_at, now()),
+               lease_expires_at = now() + INTERVAL '{ASSIGNMENT_LEASE_HOURS} hours'
+         WHERE status_num = 1 AND assigned_to IS NOT NULL AND lease_expires_at IS NULL;
+        """)
+        cur.execute("""
+        CREATE TABLE IF NOT EXISTS assignment_reclaims (
+            id SERIAL PRIMARY KEY,
+            user_id INT NOT NULL,
+            roll_no VARCHAR(10),
+            profile VARCHAR(500),
+            reviewer VARCHAR(30),
+            assigned_at TIMESTAMPTZ,
+            reclaimed_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+        );
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_assignment_reclaims_time ON assignment_reclaims (reclaimed_at);")
+        # Set when a reviewer's leases are reclaimed; the allocator skips them until
+        # their next login renews their leases and clears it
+        cur.execute("ALTER TABLE reviewer_data ADD COLUMN IF NOT EXISTS leases_lapsed_at TIMESTAMPTZ;")
+
+        # Keyset pagination / filter indexes for the admin tables
+        for ddl in (
+            "CREATE INDEX IF NOT EXISTS idx_user_data_submission ON user_data (submission_time, id);",
+            "CREATE INDEX IF NOT EXISTS idx_user_data_name_id ON user_data (name, id);",
+            "CREATE INDEX IF NOT EXISTS idx_user_data_roll_no_id ON user_data (roll_no, id);",
+            "CREATE INDEX IF NOT EXISTS idx_user_data_status_profile ON user_data (status_num, profiles);",
+            "CREATE INDEX IF NOT EXISTS idx_user_data_assigned_to ON user_data (assigned_to);",
+            """CREATE INDEX IF NOT EXISTS idx_user_data_lease_expiry ON user_data (lease_expires_at)
+                WHERE status_num = 1 AND assigned_to IS NOT NULL;""",
+            # Per-domain queue of unassigned CVs for "Claim next CV"
+            """CREATE INDEX IF NOT EXISTS idx_user_data_claim_queue
+                   ON user_data (canonical_profile(profiles), submission_time, id)
+                WHERE status_num = 1 AND assigned_to IS NULL;""",
+            "CREATE INDEX IF NOT EXISTS idx_reviewer_data_name_id ON reviewer_data (name, id);",
+            "CREATE INDEX IF NOT EXISTS idx_reviews_data_submission ON reviews_data (submission_time, id);",
+            "CREATE INDEX IF NOT EXISTS idx_reviews_data_roll_no_id ON reviews_data (roll_no, id);",
+            "CREATE INDEX IF NOT EXISTS idx_reviews_data_reviewer ON reviews_data (reviewer_name);",
+            # Nullable sort columns page on (col IS NULL, COALESCE(col, fill), id); see admin_tables
+            """CREATE INDEX IF NOT EXISTS idx_user_data_submission_keyset
+                   ON user_data ((submission_time IS NULL), COALESCE(submission_time, '-infinity'::timestamptz), id);""",
+            """CREATE INDEX IF NOT EXISTS idx_reviews_data_submission_keyset
+                   ON reviews_data ((submission_time IS NULL), COALESCE(submission_time, '-infinity'::timestamptz), id);""",
+            """CREATE INDEX IF NOT EXISTS idx_reviews_data_roll_no_keyset
+                   ON reviews_data ((roll_no IS NULL), COALESCE(roll_no, ''::text), id);""",
+        ):
+            cur.execute(ddl)
+
+        # Pre-aggregated admin analytics, refreshed concurrently by analytics.py
+        cur.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_profile_stats AS
+        SELECT COALESCE(profiles, 'Unknown') AS profile,
+               COUNT(*) AS submitted,
+               COUNT(*) FILTER (WHERE status_num = 2) AS reviewed,
+               COUNT(*) FILTER (WHERE status_num = 1 AND assigned_to IS NOT NULL) AS in_review,
+               COUNT(*) FILTER (WHERE status_num = 1 AND assigned_to IS NULL) AS backlog,
+               MIN(submission_time) FILTER (WHERE status_num = 1 AND assigned_to IS NULL) AS oldest_backlog,
+               now() AS refreshed_at
+          FROM user_data
+         GROUP BY 1;
+        """)
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_profile_stats ON mv_profile_stats (profile);")
+        cur.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_reviewer_throughput AS
+        SELECT r.name AS reviewer,
+               r.rprofilez,
+               r.reviewsnumber AS quota,
+               COALESCE(rv.completed, 0) AS completed,
+               COALESCE(rv.last_7_days, 0) AS last_7_days,
+               COALESCE(p.pending, 0) AS pending,
+               rv.last_review_at,
+               now() AS refreshed_at
+          FROM reviewer_data r
+          LEFT JOIN (
+                SELECT reviewer_name,
+                       COUNT(*) AS completed,
+                       COUNT(*) FILTER (WHERE submission_time > now() - INTERVAL '7 days') AS last_7_days,
+                       MAX(submission_time) AS last_review_at
+                  FROM reviews_data
+                 GROUP BY reviewer_name
+          ) rv ON rv.reviewer_name = r.name
+          LEFT JOIN (
+                SELECT assigned_to, COUNT(*) AS pending
+                  FROM user_data
+                 WHERE status_num = 1 AND assigned_to IS NOT NULL
+                 GROUP BY assigned_to
+          ) p ON p.assigned_to = r.name;
+        """)
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_reviewer_throughput ON mv_reviewer_throughput (reviewer);")
+        cur.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_turnaround AS
+        WITH first_review AS (
+            SELECT roll_no, MIN(submission_time) AS reviewed_at
+              FROM reviews_data
+             GROUP BY roll_no
+        ), submissions AS (
+            SELECT DISTINCT ON (roll_no) roll_no, COALESCE(profiles, 'Unknown') AS profile, submission_time
+              FROM user_data
+             ORDER BY roll_no, id
+        )
+        SELECT CASE WHEN GROUPING(s.profile) = 1 THEN 'All' ELSE s.profile END AS profile,
+               COUNT(*) AS reviewed,
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM f.reviewed_at - s.submission_time) / 3600) AS p50_hours,
+               percentile_cont(0.9) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM f.reviewed_at - s.submission_time) / 3600) AS p90_hours,
+               percentile_cont(0.99) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM f.reviewed_at - s.submission_time) / 3600) AS p99_hours,
+               now() AS refreshed_at
+          FROM submissions s
+          JOIN first_review f USING (roll_no)
+         GROUP BY GROUPING SETS ((s.profile), ());
+        """)
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_turnaround ON mv_turnaround (profile);")
+        cur.execute("""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS mv_assignment_health AS
+        WITH first_review AS (
+            SELECT roll_no, MIN(submission_time) AS reviewed_at
+              FROM reviews_data
+             GROUP BY roll_no
+        ), assigned AS (
+            SELECT COALESCE(u.profiles, 'Unknown') AS profile,
+                   EXTRACT(EPOCH FROM f.reviewed_at - u.assigned_at) / 3600 AS hours
+              FROM user_data u
+              JOIN first_review f USING (roll_no)
+             WHERE u.assigned_at IS NOT NULL AND f.reviewed_at >= u.assigned_at
+        ), reclaims AS (
+            SELECT COALESCE(profile, 'Unknown') AS profile,
+                   COUNT(*) AS reclaimed,
+                   COUNT(*) FILTER (WHERE reclaimed_at > now() - INTERVAL '7 days') AS reclaimed_7_days
+              FROM assignment_reclaims
+             GROUP BY GROUPING SETS ((COALESCE(profile, 'Unknown')), ())
+        ), turnaround AS (
+            SELECT CASE WHEN GROUPING(profile) = 1 THEN 'All' ELSE profile END AS profile,
+                   COUNT(*) AS reviewed_after_assignment,
+                   percentile_cont(0.5) WITHIN GROUP (ORDER BY hours) AS p50_assign_to_review_hours,
+                   percentile_cont(0.9) WITHIN GROUP (ORDER BY hours) AS p90_assign_to_review_hours
+              FROM assigned
+             GROUP BY GROUPING SETS ((profile), ())
+        )
+        SELECT COALESCE(t.profile, r.profile, 'All') AS profile,
+               COALESCE(t.reviewed_after_assignment, 0) AS reviewed_after_assignment,
+               t.p50_assign_to_review_hours,
+               t.p90_assign_to_review_hours,
+               COALESCE(r.reclaimed, 0) AS reclaimed,
+               COALESCE(r.reclaimed_7_days, 0) AS reclaimed_7_days,
+               now() AS refreshed_at
+          FROM turnaround t
+          FULL JOIN (
+                SELECT COALESCE(profile, 'All') AS profile, reclaimed, reclaimed_7_days FROM reclaims
+          ) r ON r.profile = t.profile;
+        """)
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_assignment_health ON mv_assignment_health (profile);")
+
+    # pg_trgm may need elevated privileges, so keep it out of the main schema transaction
+    try:
+        with get_db_cursor() as (_, cur):
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm;")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_user_data_name_trgm ON user_data USING GIN (name gin_trgm_ops);")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_user_data_roll_no_trgm ON user_data USING GIN (roll_no gin_trgm_ops);")
+    except Exception as e:
+        print(f"pg_trgm setup skipped: {e}")
+
 # Initialize on import
 try:
     init_db()
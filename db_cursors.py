@@ -0,0 +1,26 @@
+import time
+
+from psycopg2.extras import RealDictCursor
+
+
+class TimedCursor(RealDictCursor):
+    """RealDictCursor that counts its statements and adds up the time spent in them"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statements = 0
+        self.db_seconds = 0.0
+
+    def _timed(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            self.statements += 1
+            self.db_seconds += time.perf_counter() - start
+
+    def execute(self, query, vars=None):
+        return self._timed(super().execute, query, vars)
+
+    def copy_expert(self, sql, file, size=8192):
+        return self._timed(super().copy_expert, sql, file, size)
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Admin data exports: gzipped CSV via COPY and columnar Parquet.
+
+Write the season's data as Parquet, or compare both formats:
+    python exports.py --out ./exports
+    python exports.py --benchmark
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+from allocation import ALLOCATION_STATS_SQL
+
+# Exports stay in memory up to this size, then spill to a temp file on disk
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+PARQUET_BATCH_SIZE = 5000
+PARQUET_COMPRESSION = "zstd"
+
+# Whitelisted export queries; columns match the admin editors
+EXPORT_QUERIES = {
+    "user_data": """
+        SELECT id, name, roll_no, email_id, drive_link, status_num, profiles, assigned_to, submission_time
+          FROM user_data ORDER BY id
+    """,
+    "reviewer_data": """
+        SELECT rd.id, rd.name, rd.password, rd.reviewsnumber,
+               COALESCE(rv.completed, 0) AS cvsreviewed, rd.linkedin, rd.email, rd.rprofilez
+          FROM reviewer_data rd
+          LEFT JOIN (
+                SELECT reviewer_name, COUNT(*) AS completed FROM reviews_data GROUP BY reviewer_name
+          ) rv ON rv.reviewer_name = rd.name
+         ORDER BY rd.id
+    """,
+    "reviews_data": """
+        SELECT id, name, roll_no, email_id, reviewer_name, reviewer_linkedin, reviewer_email,
+               drive_link, review, structure_format, domain_relevance, depth_explanation,
+               language_grammar, project_improvements, additional_suggestions, submission_time
+          FROM reviews_data ORDER BY submission_time DESC, id DESC
+    """,
+    "allocation_report": f"""
+        SELECT name, rprofilez, reviewsnumber, completed_reviews, total_assigned, remaining_capacity,
+               leases_lapsed_at
+          FROM ({ALLOCATION_STATS_SQL}) s
+         ORDER BY rprofilez, total_assigned
+    """,
+}
+
+# Column names and types for Parquet output; write_parquet matches them to the
+# query's columns by name
+_TEXT, _INT, _TS = "string", "int64", "timestamp"
+PARQUET_COLUMNS = {
+    "user_data": [("id", _INT), ("name", _TEXT), ("roll_no", _TEXT), ("email_id", _TEXT),
+                  ("drive_link", _TEXT), ("status_num", _INT), ("profiles", _TEXT),
+                  ("assigned_to", _TEXT), ("submission_time", _TS)],
+    "reviewer_data": [("id", _INT), ("name", _TEXT), ("password", _TEXT), ("reviewsnumber", _INT),
+                      ("cvsreviewed", _INT), ("linkedin", _TEXT), ("email", _TEXT), ("rprofilez", _TEXT)],
+    "reviews_data": [("id", _INT), ("name", _TEXT), ("roll_no", _TEXT), ("email_id", _TEXT),
+                     ("reviewer_name", _TEXT), ("reviewer_linkedin", _TEXT), ("reviewer_email", _TEXT),
+                     ("drive_link", _TEXT), ("review", _TEXT), ("structure_format", _TEXT),
+                     ("domain_relevance", _TEXT), ("depth_explanation", _TEXT),
+                     ("language_grammar", _TEXT), ("project_improvements", _TEXT),
+                     ("additional_suggestions", _TEXT), ("submission_time", _TS)],
+    "allocation_report": [("name", _TEXT), ("rprofilez", _TEXT), ("reviewsnumber", _INT),
+                          ("completed_reviews", _INT), ("total_assigned", _INT),
+                          ("remaining_capacity", _INT), ("leases_lapsed_at", _TS)],
+}
+
+
+def export_csv_gz(cur, table: str):
+    """
+    Stream COPY ... TO STDOUT for an export query through gzip into a spooled
+    temp file. psycopg2 writes the COPY data as it arrives, so no DataFrame or
+    full CSV string is ever built. Returns the file rewound to 0.
+    """
+    query = EXPORT_QUERIES[table]
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode="w+b")
+    with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6) as gz:
+        cur.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER true)", gz)
+    out.seek(0)
+    return out
+
+
+def _arrow_schema(table: str):
+    import pyarrow as pa
+
+    types = {_TEXT: pa.string(), _INT: pa.int64(), _TS: pa.timestamp("us", tz="UTC")}
+    return pa.schema([(name, types[kind]) for name, kind in PARQUET_COLUMNS[table]])
+
+
+def write_parquet(conn, table: str, sink, batch_size: int = PARQUET_BATCH_SIZE):
+    """
+    Read an export query in batches through a server-side cursor (plain tuples,
+    not RealDictCursor) and write each batch as a Parquet row group. Query
+    columns are matched to the schema by name, so a missing one raises KeyError.
+    Returns the number of rows written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(table)
+    rows_written = 0
+    with conn.cursor(name=f"export_{table}") as cur:
+        cur.itersize = batch_size
+        cur.execute(EXPORT_QUERIES[table])
+        with pq.ParquetWriter(sink, schema, compression=PARQUET_COMPRESSION) as writer:
+            positions = None
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                if positions is None:
+                    # Named cursors only fill description once the first rows arrive
+                    index = {column.name: i for i, column in enumerate(cur.description)}
+                    positions = [index[field.name] for field in schema]
+                columns = list(zip(*rows))
+                batch = pa.RecordBatch.from_arrays(
+                    [pa.array(columns[i], type=field.type) for i, field in zip(positions, schema)],
+                    schema=schema,
+                )
+                writer.write_batch(batch)
+                rows_written += len(rows)
+    return rows_written
+
+
+def export_season_parquet_zip(conn, tables=tuple(EXPORT_QUERIES)):
+    """Bundle one Parquet file per table into a zip held in a spooled temp file"""
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode="w+b")
+    # Parquet pages are already compressed, so the zip only stores them
+    with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_STORED) as bundle:
+        for table in tables:
+            with tempfile.TemporaryFile() as part:
+                write_parquet(conn, table, part)
+                part.seek(0)
+                with bundle.open(f"{table}.parquet", "w") as entry:
+                    while True:
+                        chunk = part.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        entry.write(chunk)
+    out.seek(0)
+    return out
+
+
+def export_season_parquet(out_dir: str, tables=tuple(EXPORT_QUERIES)):
+    from database_pool import get_db_cursor
+
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    with get_db_cursor() as (conn, _):
+        for table in tables:
+            path = os.path.join(out_dir, f"{table}.parquet")
+            written[table] = (path, write_parquet(conn, table, path))
+    return written
+
+
+def benchmark(tables=tuple(EXPORT_QUERIES)):
+    """Compare size and time of the gzipped CSV and Parquet paths for each table"""
+    from database_pool import get_db_cursor
+
+    report = []
+    with get_db_cursor() as (conn, cur):
+        for table in tables:
+            start = time.perf_counter()
+            csv_file = export_csv_gz(cur, table)
+            csv_seconds = time.perf_counter() - start
+            csv_file.seek(0, os.SEEK_END)
+            csv_bytes = csv_file.tell()
+            csv_file.close()
+
+            with tempfile.TemporaryFile() as part:
+                start = time.perf_counter()
+                rows = write_parquet(conn, table, part)
+                parquet_seconds = time.perf_counter() - start
+                parquet_bytes = part.tell()
+
+            report.append({
+                "table": table,
+                "rows": rows,
+                "csv_gz_bytes": csv_bytes,
+                "csv_gz_seconds": csv_seconds,
+                "parquet_bytes": parquet_bytes,
+                "parquet_seconds": parquet_seconds,
+            })
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the season's data as Parquet")
+    parser.add_argument("--out", default="./exports", help="Output directory for .parquet files")
+    parser.add_argument("--benchmark", action="store_true", help="Compare CSV (gzip) and Parquet size/time")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print(f"{'table':<18} {'rows':>7} {'csv.gz KB':>10} {'csv s':>7} {'parquet KB':>11} {'parquet s':>10}")
+        for r in benchmark():
+            print(f"{r['table']:<18} {r['rows']:>7} {r['csv_gz_bytes'] / 1024:>10.1f} {r['csv_gz_seconds']:>7.3f} "
+                  f"{r['parquet_bytes'] / 1024:>11.1f} {r['parquet_seconds']:>10.3f}")
+        return 0
+
+    for table, (path, rows) in export_season_parquet(args.out).items():
+        print(f"✅ {table}: {rows} rows → {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+import io
+import multiprocessing
+
+from PyPDF2 import PdfReader
+from PyPDF2.errors import PdfReadError
+
+# Upload policy for resumes
+MAX_PDF_BYTES = 2 * 1024 * 1024
+MAX_PDF_PAGES = 3
+PARSE_TIMEOUT_SECONDS = 3.0
+
+PDF_MAGIC = b"%PDF-"
+PDF_EOF_MARKER = b"%%EOF"
+
+# Parsing runs in a child process that is killed when it overruns, so a pathological
+# PDF can neither stall the Streamlit thread nor keep burning CPU in the background.
+# forkserver/spawn avoid forking the threaded Streamlit process.
+_parse_context = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+def _count_pages(data: bytes):
+    """Parse the PDF structure and return (page_count, is_encrypted)"""
+    reader = PdfReader(io.BytesIO(data), strict=False)
+    if reader.is_encrypted:
+        return 0, True
+    return len(reader.pages), False
+
+
+def _count_pages_worker(data: bytes, conn):
+    """Child process entry point: send back ("ok", pages, encrypted) or ("error", kind, detail)"""
+    try:
+        conn.send(("ok", *_count_pages(data)))
+    except (PdfReadError, ValueError, KeyError, TypeError) as e:
+        conn.send(("error", "read", str(e)))
+    except Exception as e:
+        conn.send(("error", "unexpected", str(e)))
+    finally:
+        conn.close()
+
+
+def _count_pages_with_timeout(data: bytes, timeout: float):
+    """Run _count_pages in a child process; returns its result tuple, or None on timeout"""
+    parent_conn, child_conn = _parse_context.Pipe(duplex=False)
+    worker = _parse_context.Process(target=_count_pages_worker, args=(data, child_conn), daemon=True)
+    worker.start()
+    child_conn.close()
+    try:
+        if parent_conn.poll(timeout):
+            return parent_conn.recv()
+        return None
+    except EOFError:
+        # The worker died without answering (e.g. crashed inside the parser)
+        return ("error", "unexpected", f"parser process exited with code {worker.exitcode}")
+    finally:
+        parent_conn.close()
+        if worker.is_alive():
+            worker.terminate()
+        worker.join(1)
+
+
+def validate_pdf(data: bytes, max_bytes: int = MAX_PDF_BYTES, max_pages: int = MAX_PDF_PAGES,
+                 timeout: float = PARSE_TIMEOUT_SECONDS):
+    """
+    Validate an uploaded resume before it is stored or cached.
+    Cheap checks (size, magic bytes, EOF marker) run first; page counting
+    and encryption detection run in a child process that is killed once it
+    exceeds the time budget.
+    Returns a dict with 'valid', 'message' and 'pages'.
+    """
+    size = len(data)
+    if size == 0:
+        return {"valid": False, "message": "The uploaded file is empty.", "pages": 0}
+    if size > max_bytes:
+        return {"valid": False,
+                "message": f"File too large—please upload a PDF under {max_bytes // (1024 * 1024)} MB.",
+                "pages": 0}
+    if not data[:1024].lstrip().startswith(PDF_MAGIC):
+        return {"valid": False, "message": "This file is not a valid PDF.", "pages": 0}
+    if PDF_EOF_MARKER not in data[-2048:]:
+        return {"valid": False, "message": "This PDF appears to be truncated or corrupted.", "pages": 0}
+
+    try:
+        result = _count_pages_with_timeout(data, timeout)
+    except Exception as e:
+        print(f"Unexpected PDF validation error: {e}")
+        result = ("error", "unexpected", str(e))
+
+    if result is None:
+        return {"valid": False, "message": "This PDF took too long to process. Please re-export it and try again.",
+                "pages": 0}
+    if result[0] == "error":
+        _, kind, detail = result
+        print(f"PDF validation failed: {detail}" if kind == "read" else f"Unexpected PDF validation error: {detail}")
+        return {"valid": False, "message": "This PDF could not be read. Please re-export it and try again.",
+                "pages": 0}
+    _, pages, encrypted = result
+
+    if encrypted:
+        return {"valid": False, "message": "Password-protected PDFs are not supported.", "pages": 0}
+    if pages == 0:
+        return {"valid": False, "message": "This PDF has no pages.", "pages": 0}
+    if pages > max_pages:
+        return {"valid": False,
+                "message": f"Your resume has {pages} pages—please keep it to {max_pages} pages or fewer.",
+                "pages": pages}
+
+    return {"valid": True, "message": "OK", "pages": pages}
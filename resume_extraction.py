@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Resume text extraction pipeline.
+Extracts text, page count and section boundaries from uploaded resume PDFs
+using a process pool, and stores the results in the resume_text table keyed
+by the SHA-256 of the PDF contents.
+
+Backfill the existing corpus with:
+    python resume_extraction.py --dir ./Uploaded_Resumes --workers 4
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+RESUME_DIR = "./Uploaded_Resumes"
+STORE_BATCH_SIZE = 100
+
+# Headings commonly used in IIT KGP resumes, matched on their own line
+SECTION_HEADINGS = [
+    "Education", "Academic Details", "Scholastic Achievements", "Achievements", "Awards",
+    "Work Experience", "Experience", "Internships", "Internship", "Projects", "Key Projects",
+    "Research", "Publications", "Technical Skills", "Skills", "Skills and Expertise",
+    "Coursework", "Coursework Information", "Positions of Responsibility", "Leadership",
+    "Extra Curricular Activities", "Extracurricular Activities", "Certifications", "Competitions",
+]
+_HEADING_RE = re.compile(
+    r"^[ \t]*(" + "|".join(re.escape(h) for h in sorted(SECTION_HEADINGS, key=len, reverse=True)) + r")[ \t]*:?[ \t]*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+_executor = None
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def find_sections(text: str):
+    """Return [{'heading', 'start', 'end'}] character ranges for each detected section"""
+    matches = list(_HEADING_RE.finditer(text))
+    sections = []
+    for i, m in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections.append({"heading": m.group(1).strip().title(), "start": m.start(), "end": end})
+    return sections
+
+
+def extract_pdf_data(roll_no: str, data: bytes):
+    """
+    Worker entry point: extract one PDF's bytes. Runs in a child process, so it
+    must stay importable at module level and must not touch the database.
+    """
+    from pdfminer.high_level import extract_text
+    from pdfminer.pdfpage import PDFPage
+
+    try:
+        page_count = sum(1 for _ in PDFPage.get_pages(io.BytesIO(data)))
+        text = extract_text(io.BytesIO(data)) or ""
+        return {
+            "content_hash": content_hash(data),
+            "roll_no": roll_no,
+            "page_count": page_count,
+            "text": text.replace("\x00", ""),
+            "sections": find_sections(text),
+            "error": None,
+        }
+    except Exception as e:
+        return {"content_hash": None, "roll_no": roll_no, "error": f"{type(e).__name__}: {e}"}
+
+
+def extract_pdf(path: str):
+    """Worker entry point for files on disk; the roll number is the file name"""
+    roll_no = os.path.splitext(os.path.basename(path))[0]
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError as e:
+        return {"content_hash": None, "roll_no": roll_no, "error": f"{type(e).__name__}: {e}"}
+    return extract_pdf_data(roll_no, data)
+
+
+def get_executor(workers: int = None):
+    """
+    Process pool sized to the available cores, created once per app process.
+    Workers come from a forkserver (spawn where unavailable), like pdf_validation's,
+    so they never fork the threaded Streamlit process and inherit its held locks.
+    """
+    global _executor
+    if _executor is None:
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1,
+                                        mp_context=multiprocessing.get_context(method))
+    return _executor
+
+
+def store_results(results):
+    """Upsert successful extraction results into resume_text in one batched statement"""
+    from psycopg2.extras import execute_values
+    from database_pool import get_db_cursor
+
+    rows = [
+        (r["content_hash"], r["roll_no"], r["page_count"], r["text"], json.dumps(r["sections"]))
+        for r in results if not r.get("error")
+    ]
+    if not rows:
+        return 0
+    with get_db_cursor() as (_, cur):
+        execute_values(cur, """
+            INSERT INTO resume_text (content_hash, roll_no, page_count, text, sections)
+            VALUES %s
+            ON CONFLICT (content_hash) DO UPDATE
+               SET roll_no = EXCLUDED.roll_no,
+                   page_count = EXCLUDED.page_count,
+                   text = EXCLUDED.text,
+                   sections = EXCLUDED.sections,
+                   extracted_at = CURRENT_TIMESTAMP
+        """, rows, template="(%s, %s, %s, %s, %s::jsonb)")
+    return len(rows)
+
+
+def _store_future_result(future):
+    try:
+        result = future.result()
+        if result.get("error"):
+            print(f"Resume extraction failed for {result['roll_no']}: {result['error']}")
+        else:
+            store_results([result])
+    except Exception as e:
+        print(f"Error storing extracted resume: {e}")
+
+
+def schedule_extraction(roll_no: str, data: bytes):
+    """Queue a freshly uploaded resume for background extraction; never blocks the caller"""
+    try:
+        future = get_executor().submit(extract_pdf_data, roll_no, data)
+        future.add_done_callback(_store_future_result)
+        return future
+    except Exception as e:
+        print(f"Could not schedule resume extraction: {e}")
+        return None
+
+
+def get_existing_hashes():
+    from database_pool import get_db_cursor
+
+    with get_db_cursor() as (_, cur):
+        cur.execute("SELECT content_hash FROM resume_text;")
+        return {r["content_hash"] for r in cur.fetchall()}
+
+
+def backfill(directory: str = RESUME_DIR, workers: int = None, force: bool = False):
+    """Extract every PDF in directory and report throughput"""
+    paths = sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if name.lower().endswith(".pdf")
+    )
+    if not force:
+        known = get_existing_hashes()
+        pending = []
+        for path in paths:
+            with open(path, "rb") as f:
+                if content_hash(f.read()) not in known:
+                    pending.append(path)
+        skipped = len(paths) - len(pending)
+        paths = pending
+    else:
+        skipped = 0
+
+    workers = workers or os.cpu_count() or 1
+    total_bytes = sum(os.path.getsize(p) for p in paths)
+    extracted, failed, stored = 0, 0, 0
+    batch = []
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(extract_pdf, p) for p in paths]
+        for future in as_completed(futures):
+            result = future.result()
+            if result.get("error"):
+                failed += 1
+                print(f"❌ {result['roll_no']}: {result['error']}")
+                continue
+            extracted += 1
+            batch.append(result)
+            if len(batch) >= STORE_BATCH_SIZE:
+                stored += store_results(batch)
+                batch = []
+    stored += store_results(batch)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "files": len(paths),
+        "skipped": skipped,
+        "extracted": extracted,
+        "failed": failed,
+        "stored": stored,
+        "workers": workers,
+        "seconds": elapsed,
+        "docs_per_second": extracted / elapsed if elapsed > 0 else 0.0,
+        "mb_per_second": (total_bytes / (1024 * 1024)) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backfill resume_text from the uploaded resume corpus")
+    parser.add_argument("--dir", default=RESUME_DIR, help="Directory containing <roll_no>.pdf files")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="Re-extract files that are already stored")
+    args = parser.parse_args(argv)
+
+    report = backfill(args.dir, args.workers, args.force)
+    print(f"📄 Files processed: {report['files']} (skipped {report['skipped']} already extracted)")
+    print(f"✅ Extracted: {report['extracted']}  ❌ Failed: {report['failed']}  💾 Stored: {report['stored']}")
+    print(f"⏱️  {report['seconds']:.2f}s with {report['workers']} workers — "
+          f"{report['docs_per_second']:.1f} docs/s, {report['mb_per_second']:.2f} MB/s")
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Batched skill extraction over the resume_text table.
+The spaCy model is loaded once per process and documents are streamed
+through nlp.pipe; matched skills are normalized and written per roll_no
+into resume_skills.
+
+    python skill_extraction.py --batch-size 64 --processes 2
+    python skill_extraction.py --benchmark
+"""
+
+import argparse
+import csv
+import importlib.util
+import os
+import sys
+import time
+
+SPACY_MODEL = "en_core_web_sm"
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_PROCESSES = 1
+
+# Matching only needs the tokenizer; skipping the statistical components is what
+# makes nlp.pipe fast enough to run over the whole season in one go.
+PIPELINE_EXCLUDE = ["tok2vec", "tagger", "parser", "attribute_ruler", "lemmatizer", "ner", "senter"]
+
+# Used when pyresparser's skills vocabulary is not available
+FALLBACK_SKILLS = [
+    "python", "c++", "java", "sql", "r", "matlab", "excel", "tableau", "power bi", "pandas", "numpy",
+    "scikit-learn", "tensorflow", "pytorch", "machine learning", "deep learning", "nlp",
+    "computer vision", "data analysis", "statistics", "react", "node.js", "django", "flask",
+    "javascript", "html", "css", "git", "docker", "kubernetes", "aws", "linux",
+    "financial modeling", "valuation", "derivatives", "product management", "market research",
+    "autocad", "solidworks", "ansys", "verilog", "embedded systems",
+]
+
+_nlp = None
+_matcher = None
+_canonical = None
+
+
+def load_skill_vocabulary():
+    """Return the canonical (lower-cased) skill list, preferring pyresparser's skills.csv"""
+    spec = importlib.util.find_spec("pyresparser")
+    if spec and spec.origin:
+        path = os.path.join(os.path.dirname(spec.origin), "skills.csv")
+        if os.path.exists(path):
+            with open(path, newline="", encoding="utf-8") as f:
+                skills = {cell.strip().lower() for row in csv.reader(f) for cell in row if cell.strip()}
+            if skills:
+                return sorted(skills)
+    return sorted(set(FALLBACK_SKILLS))
+
+
+def get_nlp():
+    """Load the spaCy model and skill matcher once per process"""
+    global _nlp, _matcher, _canonical
+    if _nlp is None:
+        import spacy
+        from spacy.matcher import PhraseMatcher
+
+        _nlp = spacy.load(SPACY_MODEL, exclude=PIPELINE_EXCLUDE)
+        _canonical = load_skill_vocabulary()
+        _matcher = PhraseMatcher(_nlp.vocab, attr="LOWER")
+        _matcher.add("SKILL", list(_nlp.tokenizer.pipe(_canonical)))
+    return _nlp, _matcher
+
+
+def normalize_skill(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def extract_skills_batch(records, batch_size: int = DEFAULT_BATCH_SIZE, processes: int = DEFAULT_PROCESSES):
+    """
+    records: iterable of (roll_no, text). Yields (roll_no, sorted skill list).
+    Documents are tokenized in worker processes; matching runs on the returned Docs.
+    """
+    nlp, matcher = get_nlp()
+    records = list(records)
+    texts = ((text or "", roll_no) for roll_no, text in records)
+    for doc, roll_no in nlp.pipe(texts, as_tuples=True, batch_size=batch_size, n_process=processes):
+        skills = {normalize_skill(doc[start:end].text) for _, start, end in matcher(doc)}
+        yield roll_no, sorted(skills)
+
+
+def fetch_resume_texts(roll_nos=None):
+    """Latest extracted text per roll_no from resume_text"""
+    from database_pool import get_db_cursor
+
+    sql = """
+        SELECT DISTINCT ON (roll_no) roll_no, text
+          FROM resume_text
+         WHERE roll_no IS NOT NULL {filter}
+         ORDER BY roll_no, extracted_at DESC
+    """
+    with get_db_cursor() as (_, cur):
+        if roll_nos:
+            cur.execute(sql.format(filter="AND roll_no = ANY(%s)"), (list(roll_nos),))
+        else:
+            cur.execute(sql.format(filter=""))
+        return [(r["roll_no"], r["text"]) for r in cur.fetchall()]
+
+
+def store_skills(results):
+    """Replace the stored skills for every roll_no in results with one DELETE and one bulk INSERT"""
+    from psycopg2.extras import execute_values
+    from database_pool import get_db_cursor
+
+    results = list(results)
+    if not results:
+        return 0
+    rows = [(roll_no, skill) for roll_no, skills in results for skill in skills]
+    with get_db_cursor() as (_, cur):
+        cur.execute("DELETE FROM resume_skills WHERE roll_no = ANY(%s)", ([r for r, _ in results],))
+        if rows:
+            execute_values(cur, "INSERT INTO resume_skills (roll_no, skill) VALUES %s ON CONFLICT DO NOTHING", rows)
+    return len(rows)
+
+
+def run_extraction(roll_nos=None, batch_size: int = DEFAULT_BATCH_SIZE, processes: int = DEFAULT_PROCESSES):
+    records = fetch_resume_texts(roll_nos)
+    start = time.perf_counter()
+    results = list(extract_skills_batch(records, batch_size, processes))
+    elapsed = time.perf_counter() - start
+    stored = store_skills(results)
+    return {
+        "docs": len(results),
+        "skills_stored": stored,
+        "seconds": elapsed,
+        "docs_per_second": len(results) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def benchmark(batch_sizes=(16, 64, 256), process_counts=(1, 2), sample_size: int = 500):
+    """Report docs/s for each batch size × process count over stored (or synthetic) resumes"""
+    try:
+        records = fetch_resume_texts()
+    except Exception as e:
+        print(f"Could not read resume_text ({e}); using synthetic resumes")
+        records = []
+    if not records:
+        vocab = FALLBACK_SKILLS
+        records = [
+            (f"SYN{i:05d}",
+             "Education\nIIT Kharagpur\nSkills\n" + ", ".join(vocab[i % 7::5]) +
+             f"\nProjects\nBuilt a pipeline using {vocab[i % len(vocab)]} and {vocab[(i * 3) % len(vocab)]}")
+            for i in range(sample_size)
+        ]
+    records = (records * (sample_size // len(records) + 1))[:sample_size]
+
+    get_nlp()  # exclude model load time from the measurements
+    report = []
+    for processes in process_counts:
+        for batch_size in batch_sizes:
+            start = time.perf_counter()
+            count = sum(1 for _ in extract_skills_batch(records, batch_size, processes))
+            elapsed = time.perf_counter() - start
+            report.append({
+                "processes": processes,
+                "batch_size": batch_size,
+                "docs": count,
+                "seconds": elapsed,
+                "docs_per_second": count / elapsed if elapsed > 0 else 0.0,
+            })
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract normalized skills from stored resume text")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES)
+    parser.add_argument("--roll-no", action="append", help="Only process these roll numbers")
+    parser.add_argument("--benchmark", action="store_true", help="Report docs/s without writing")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        print(f"{'processes':>9} {'batch':>6} {'docs':>6} {'seconds':>8} {'docs/s':>9}")
+        for row in benchmark():
+            print(f"{row['processes']:>9} {row['batch_size']:>6} {row['docs']:>6} "
+                  f"{row['seconds']:>8.2f} {row['docs_per_second']:>9.1f}")
+        return 0
+
+    report = run_extraction(args.roll_no, args.batch_size, args.processes)
+    print(f"🧠 {report['docs']} resumes → {report['skills_stored']} skills in {report['seconds']:.2f}s "
+          f"({report['docs_per_second']:.1f} docs/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
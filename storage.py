@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Resume storage backends.
+STORAGE_BACKEND=local (default) keeps PDFs under ./Uploaded_Resumes;
+STORAGE_BACKEND=s3 stores them in an S3-compatible bucket (AWS S3, MinIO, ...).
+
+Smoke-test a backend (e.g. against a local MinIO) with:
+    STORAGE_BACKEND=s3 S3_ENDPOINT_URL=http://localhost:9000 S3_BUCKET=resumes python storage.py
+"""
+
+import os
+import sys
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+RESUME_DIR = "./Uploaded_Resumes"
+DEFAULT_CHUNK_SIZE = 256 * 1024
+PRESIGNED_URL_TTL = 900
+
+
+def resume_key(roll_no: str) -> str:
+    """Storage key for a student's resume; kept as <roll_no>.pdf for the existing corpus"""
+    return f"{roll_no}.pdf"
+
+
+class LocalStorage:
+    """Stores objects as files under a root directory"""
+
+    def __init__(self, root: str = RESUME_DIR):
+        self.root = root
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.normpath(self.root) + os.sep):
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def put(self, key: str, data: bytes, content_type: str = "application/pdf"):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".part"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get(self, key: str):
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        with open(self._path(key), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def get_range(self, key: str, start: int, end: int):
+        """Bytes start..end inclusive, like an HTTP Range request"""
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            return f.read(end - start + 1)
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def presigned_url(self, key: str, expires_in: int = PRESIGNED_URL_TTL):
+        """Local files are not reachable by the browser directly"""
+        return None
+
+
+class S3Storage:
+    """Stores objects in an S3-compatible bucket"""
+
+    def __init__(self, bucket: str, endpoint_url: str = None, region: str = None, prefix: str = ""):
+        import boto3
+        from botocore.config import Config
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=endpoint_url or None,
+            region_name=region or None,
+            config=Config(signature_version="s3v4", retries={"max_attempts": 3, "mode": "standard"}),
+        )
+
+    def _key(self, key: str) -> str:
+        return self.prefix + key
+
+    def put(self, key: str, data: bytes, content_type: str = "application/pdf"):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data, ContentType=content_type)
+
+    def get(self, key: str):
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+
+    def stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        body = self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+        try:
+            for chunk in body.iter_chunks(chunk_size):
+                yield chunk
+        finally:
+            body.close()
+
+    def get_range(self, key: str, start: int, end: int):
+        """Bytes start..end inclusive, like an HTTP Range request"""
+        response = self.client.get_object(Bucket=self.bucket, Key=self._key(key), Range=f"bytes={start}-{end}")
+        return response["Body"].read()
+
+    def exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404", "NotFound"):
+                return False
+            raise
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def presigned_url(self, key: str, expires_in: int = PRESIGNED_URL_TTL):
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": self._key(key), "ResponseContentType": "application/pdf"},
+            ExpiresIn=expires_in,
+        )
+
+
+_storage = None
+
+
+def get_storage():
+    """Return the configured storage backend (created once per process)"""
+    global _storage
+    if _storage is None:
+        backend = os.getenv("STORAGE_BACKEND", "local").lower()
+        if backend == "s3":
+            _storage = S3Storage(
+                bucket=os.getenv("S3_BUCKET"),
+                endpoint_url=os.getenv("S3_ENDPOINT_URL"),
+                region=os.getenv("S3_REGION"),
+                prefix=os.getenv("S3_PREFIX", ""),
+            )
+        else:
+            _storage = LocalStorage(os.getenv("RESUME_DIR", RESUME_DIR))
+    return _storage
+
+
+def smoke_test():
+    """Round-trip a small object through every storage operation"""
+    storage = get_storage()
+    key = "__storage_smoke_test__.pdf"
+    payload = b"%PDF-1.4\n% storage smoke test\n%%EOF\n"
+    try:
+        print(f"Testing {type(storage).__name__}...")
+        storage.put(key, payload)
+        assert storage.exists(key), "object missing after put"
+        assert storage.get(key) == payload, "get returned different bytes"
+        assert b"".join(storage.stream(key, chunk_size=8)) == payload, "stream returned different bytes"
+        assert storage.get_range(key, 0, 4) == b"%PDF-", "range get returned wrong bytes"
+        print(f"✅ Presigned URL: {storage.presigned_url(key, expires_in=60)}")
+        storage.delete(key)
+        assert not storage.exists(key), "object still present after delete"
+        print("🎉 All storage tests passed!")
+        return True
+    except Exception as e:
+        print(f"❌ Storage test failed: {e}")
+        return False
+
+
+if __name__ == "__main__":
+    sys.exit(0 if smoke_test() else 1)
@@ -0,0 +1,226 @@
+import time
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+# Editable user_data columns and the SQL types used to cast VALUES lists
+USER_DATA_COLUMNS = {
+    "name": "varchar",
+    "roll_no": "varchar",
+    "email_id": "varchar",
+    "drive_link": "varchar",
+    "status_num": "int",
+    "profiles": "varchar",
+    "assigned_to": "varchar",
+}
+
+# Editable reviewer_data columns (cvsreviewed is derived from reviews_data)
+REVIEWER_DATA_COLUMNS = {
+    "name": "varchar",
+    "password": "varchar",
+    "reviewsnumber": "int",
+    "linkedin": "varchar",
+    "email": "varchar",
+    "rprofilez": "varchar",
+}
+
+# Editable reviews_data columns (submission_time is never written from the editor)
+REVIEWS_DATA_COLUMNS = {
+    "name": "varchar",
+    "roll_no": "varchar",
+    "email_id": "varchar",
+    "reviewer_name": "varchar",
+    "reviewer_linkedin": "varchar",
+    "reviewer_email": "varchar",
+    "drive_link": "varchar",
+    "review": "text",
+    "structure_format": "text",
+    "domain_relevance": "text",
+    "depth_explanation": "text",
+    "language_grammar": "text",
+    "project_improvements": "text",
+    "additional_suggestions": "text",
+}
+# Optional reviews_data fields where an emptied cell is stored as NULL
+REVIEWS_BLANK_AS_NULL = [
+    "email_id", "reviewer_linkedin", "reviewer_email", "drive_link", "review",
+    "structure_format", "domain_relevance", "depth_explanation", "language_grammar",
+    "project_improvements", "additional_suggestions",
+]
+
+
+def to_db_value(v):
+    """Convert pandas/numpy cell values into something psycopg2 can adapt"""
+    if v is None:
+        return None
+    if isinstance(v, (list, dict)):
+        return v
+    if pd.isna(v):
+        return None
+    if isinstance(v, np.generic):
+        return v.item()
+    if isinstance(v, pd.Timestamp):
+        return v.to_pydatetime()
+    return v
+
+
+def compute_changes(original_df, edited_df, editor_state=None, key="id", columns=None, version_col="row_version"):
+    """
+    Work out which rows the admin actually touched.
+    Uses the st.data_editor change set when available (O(changes)); otherwise
+    falls back to a vectorized cell comparison of the original and edited frames.
+    Returns {"inserts": [row dict], "updates": {id: {col: value}}, "deletes": [id],
+    "versions": {id: row_version as loaded}}.
+    """
+    columns = list(columns or [c for c in original_df.columns if c not in (key, version_col)])
+    changes = _compute_changes(original_df, edited_df, editor_state, key, columns)
+
+    changes["versions"] = {}
+    if version_col in original_df.columns and not original_df.empty:
+        loaded = original_df[[key, version_col]].dropna()
+        versions = dict(zip(loaded[key].astype("int64"), loaded[version_col].astype("int64")))
+        touched = set(changes["updates"]) | set(changes["deletes"])
+        changes["versions"] = {int(i): int(versions[i]) for i in touched if i in versions}
+    return changes
+
+
+def _compute_changes(original_df, edited_df, editor_state, key, columns):
+    if editor_state and any(editor_state.get(k) for k in ("edited_rows", "added_rows", "deleted_rows")):
+        deleted_positions = {int(i) for i in editor_state.get("deleted_rows", [])}
+        deletes = [to_db_value(original_df.iloc[i][key]) for i in sorted(deleted_positions)]
+        updates = {}
+        for pos, cell_changes in editor_state.get("edited_rows", {}).items():
+            pos = int(pos)
+            if pos in deleted_positions:
+                continue
+            changed = {c: to_db_value(v) for c, v in cell_changes.items() if c in columns}
+            if changed:
+                updates[to_db_value(original_df.iloc[pos][key])] = changed
+        inserts = [
+            {c: to_db_value(row.get(c)) for c in columns}
+            for row in editor_state.get("added_rows", [])
+            if any(to_db_value(row.get(c)) is not None for c in columns)
+        ]
+        return {"inserts": inserts, "updates": updates, "deletes": deletes}
+
+    # Fallback: compare the frames directly
+    new_rows = edited_df[edited_df[key].isna()]
+    inserts = [{c: to_db_value(row[c]) for c in columns} for _, row in new_rows.iterrows()]
+
+    original = original_df.set_index(original_df[key].astype("int64"))[columns]
+    existing = edited_df[edited_df[key].notna()]
+    edited = existing.set_index(existing[key].astype("int64"))[columns]
+
+    deletes = [int(i) for i in original.index.difference(edited.index)]
+    common = original.index.intersection(edited.index)
+    before = original.loc[common].astype(object)
+    after = edited.loc[common].astype(object)
+    diff_mask = ~((before == after) | (before.isna() & after.isna()))
+
+    updates = {}
+    for row_id in diff_mask.index[diff_mask.any(axis=1)]:
+        changed_cols = diff_mask.columns[diff_mask.loc[row_id]]
+        updates[int(row_id)] = {c: to_db_value(after.at[row_id, c]) for c in changed_cols}
+
+    return {"inserts": inserts, "updates": updates, "deletes": deletes}
+
+
+def _blank_to_none(v):
+    return None if (v is None or str(v).strip() == "") else v
+
+
+def bulk_apply_changes(cur, table, changes, column_types, blank_as_null=(), key="id"):
+    """
+    Apply a compute_changes() change set to table in bulk:
+    one DELETE, one execute_values INSERT, and one
+    UPDATE ... FROM (VALUES ...) per distinct set of changed columns, so only
+    the cells that were edited are written.
+    Updates and deletes only apply where row_version still matches the version
+    the admin loaded; rows that lost the race are returned as "conflicts".
+    column_types maps column name -> SQL type used to cast the VALUES list.
+    Returns counts of rows written, conflicts and the time taken.
+    """
+    start = time.perf_counter()
+    blank_as_null = set(blank_as_null)
+
+    def clean(col, v):
+        return _blank_to_none(v) if col in blank_as_null else v
+
+    versions = changes.get("versions") or {}
+    conflicts = []
+    deleted_count = 0
+
+    # Rows with a known version are only touched if nobody changed them since they were loaded
+    if changes["deletes"]:
+        checked = [(i, versions[i]) for i in changes["deletes"] if i in versions]
+        unchecked = [i for i in changes["deletes"] if i not in versions]
+        if checked:
+            deleted = execute_values(cur, f"""
+                DELETE FROM {table} AS t
+                 USING (VALUES %s) AS v({key}, row_version)
+                 WHERE t.{key} = v.{key} AND t.row_version = v.row_version
+             RETURNING t.{key}
+            """, checked, template="(%s::int, %s::int)", page_size=len(checked), fetch=True)
+            done = {r[key] for r in deleted}
+            deleted_count += len(done)
+            conflicts.extend(i for i, _ in checked if i not in done)
+        if unchecked:
+            cur.execute(f"DELETE FROM {table} WHERE {key} = ANY(%s)", (unchecked,))
+            deleted_count += cur.rowcount
+
+    if changes["inserts"]:
+        cols = list(column_types)
+        execute_values(
+            cur,
+            f"INSERT INTO {table} ({', '.join(cols)}) VALUES %s",
+            [tuple(clean(c, row.get(c)) for c in cols) for row in changes["inserts"]],
+        )
+
+    # Group updated rows by which columns changed so each group is one statement
+    groups = {}
+    for row_id, changed in changes["updates"].items():
+        cols = tuple(c for c in column_types if c in changed)
+        if cols:
+            groups.setdefault(cols, []).append(
+                (row_id, versions.get(row_id), *(clean(c, changed[c]) for c in cols))
+            )
+
+    updated = 0
+    for cols, rows in groups.items():
+        # A NULL version (row loaded without one) skips the check for that row
+        template = "(%s::int, %s::int, " + ", ".join(f"%s::{column_types[c]}" for c in cols) + ")"
+        written = execute_values(cur, f"""
+            UPDATE {table} AS t
+               SET {', '.join(f'{c} = v.{c}' for c in cols)}
+              FROM (VALUES %s) AS v({key}, row_version, {', '.join(cols)})
+             WHERE t.{key} = v.{key}
+               AND (v.row_version IS NULL OR t.row_version = v.row_version)
+         RETURNING t.{key}
+        """, rows, template=template, page_size=len(rows), fetch=True)
+        done = {r[key] for r in written}
+        updated += len(done)
+        conflicts.extend(row[0] for row in rows if row[0] not in done)
+
+    return {
+        "inserted": len(changes["inserts"]),
+        "updated": updated,
+        "deleted": deleted_count,
+        "conflicts": sorted(conflicts),
+        "statements": bool(changes["deletes"]) + bool(changes["inserts"]) + len(groups),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def format_save_report(table_label, report):
+    total = report["inserted"] + report["updated"] + report["deleted"]
+    conflicts = report.get("conflicts") or []
+    if total == 0 and not conflicts:
+        return f"ℹ️ No changes to save in {table_label}."
+    message = (f"✅ {table_label} saved: {report['updated']} updated, {report['inserted']} inserted, "
+               f"{report['deleted']} deleted in {report['seconds'] * 1000:.0f} ms")
+    if conflicts:
+        message += (f"\n\n⚠️ {len(conflicts)} row(s) were changed by someone else since you loaded them and "
+                    f"were not saved (IDs: {', '.join(str(i) for i in conflicts)}). "
+                    "They now show the latest data — re-apply your edits if still needed.")
+    return message